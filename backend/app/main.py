@@ -1,8 +1,33 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
+import os
 
 from app.routes import auth, accounts, transactions, budgets, bills, rewards, alerts, insights, categories
+from app.services.scheduler import (
+    scheduler, budget_breach_scan, anomaly_scan, balance_snapshot, bill_reminders, recurring_detection
+)
+from app.services.anomaly_detector import AnomalyDetector
+from app.services.recurring_detector import RecurringDetector
+from app.services.transaction_snapshot import transaction_snapshots
+
+# Seconds between global budget breach scans; 0 disables the scheduler job
+BUDGET_SCAN_INTERVAL_SECONDS = int(os.getenv("BUDGET_SCAN_INTERVAL_SECONDS", "300"))
+# Seconds between spending anomaly scans (nightly by default); 0 disables it
+ANOMALY_SCAN_INTERVAL_SECONDS = int(os.getenv("ANOMALY_SCAN_INTERVAL_SECONDS", "86400"))
+# Seconds between balance/net worth snapshot runs (keeps today's row fresh); 0 disables it
+BALANCE_SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("BALANCE_SNAPSHOT_INTERVAL_SECONDS", "3600"))
+# Seconds between bill reminder runs; 0 disables it
+BILL_REMINDER_INTERVAL_SECONDS = int(os.getenv("BILL_REMINDER_INTERVAL_SECONDS", "3600"))
+# Seconds between incremental recurring payment detection runs (nightly by default); 0 disables it
+RECURRING_DETECTION_INTERVAL_SECONDS = int(os.getenv("RECURRING_DETECTION_INTERVAL_SECONDS", "86400"))
+# Memory budget for in-process transaction snapshots; 0 disables them
+TRANSACTION_SNAPSHOT_MAX_MB = int(os.getenv("TRANSACTION_SNAPSHOT_MAX_MB", "256"))
+
+transaction_snapshots.configure(
+    enabled=TRANSACTION_SNAPSHOT_MAX_MB > 0,
+    max_bytes=TRANSACTION_SNAPSHOT_MAX_MB * 1024 * 1024
+)
 
 app = FastAPI(
     title="Digital Banking API",
@@ -17,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Register routes
@@ -30,6 +56,24 @@ app.include_router(alerts.router, prefix="/alerts", tags=["Alerts"])
 app.include_router(insights.router, prefix="/insights", tags=["Insights"])
 app.include_router(categories.router, prefix="", tags=["Categories"])
 
+@app.on_event("startup")
+def start_scheduler():
+    if BUDGET_SCAN_INTERVAL_SECONDS > 0:
+        scheduler.add_job("budget_breach_scan", BUDGET_SCAN_INTERVAL_SECONDS, budget_breach_scan, count_key="alerts_created")
+    if ANOMALY_SCAN_INTERVAL_SECONDS > 0:
+        scheduler.add_job(AnomalyDetector.JOB_NAME, ANOMALY_SCAN_INTERVAL_SECONDS, anomaly_scan, count_key="alerts_created")
+    if BALANCE_SNAPSHOT_INTERVAL_SECONDS > 0:
+        scheduler.add_job("balance_snapshot", BALANCE_SNAPSHOT_INTERVAL_SECONDS, balance_snapshot, count_key="net_worth_rows")
+    if BILL_REMINDER_INTERVAL_SECONDS > 0:
+        scheduler.add_job("bill_reminders", BILL_REMINDER_INTERVAL_SECONDS, bill_reminders, count_key="alerts_created")
+    if RECURRING_DETECTION_INTERVAL_SECONDS > 0:
+        scheduler.add_job(RecurringDetector.JOB_NAME, RECURRING_DETECTION_INTERVAL_SECONDS, recurring_detection, count_key="merchants")
+    scheduler.start()
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    scheduler.stop()
+
 @app.get("/")
 def root():
     return {"message": "Digital Banking API is running", "version": "1.0.0"}
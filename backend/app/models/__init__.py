@@ -7,5 +7,12 @@ from .bill import Bill
 from .reward import Reward
 from .alert import Alert
 from .category_rule import CategoryRule
+from .category_rollup import CategoryMonthlyRollup
+from .alert_counter import AlertCounter
+from .alert_archive import AlertArchive
+from .job_run import JobRun
+from .balance_snapshot import AccountBalanceSnapshot, NetWorthSnapshot
+from .recurring_payment import RecurringPayment
+from .cache_epoch import CacheEpoch
 
-__all__ = ["User", "Account", "Transaction", "Budget", "Bill", "Reward", "Alert", "CategoryRule"]
+__all__ = ["User", "Account", "Transaction", "Budget", "Bill", "Reward", "Alert", "CategoryRule", "CategoryMonthlyRollup", "AlertCounter", "AlertArchive", "JobRun", "AccountBalanceSnapshot", "NetWorthSnapshot", "RecurringPayment", "CacheEpoch"]
@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Structured dedupe key: one alert per (source, period, threshold); ad-hoc alerts are exempt
+        Index('ux_alerts_source', 'source_type', 'source_id', 'period', 'threshold',
+              unique=True, postgresql_where=text('source_type IS NOT NULL')),
+        # Inbox keyset pagination on (created_at, id), scanned backwards for newest-first pages
+        Index('ix_alerts_user_created', 'user_id', 'created_at', 'id'),
+        Index('ix_alerts_user_unread', 'user_id', 'created_at', 'id',
+              postgresql_where=text('is_read = false')),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True)
@@ -12,7 +21,17 @@ class Alert(Base):
     message = Column(Text)  # TEXT for longer messages
     alert_type = Column(String, index=True)  # info, warning, error, budget_exceeded
     is_read = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True,
+                        server_default=text("(now() AT TIME ZONE 'utc')"))
+    
+    # Alert identity for deduplication (NULL for ad-hoc alerts)
+    source_type = Column(String, nullable=True)  # e.g. "budget"
+    source_id = Column(Integer, nullable=True)  # e.g. budget id
+    period = Column(String, nullable=True)  # e.g. "2024-01"
+    threshold = Column(Integer, nullable=True)  # e.g. percentage of the budget limit
+    
+    # Number of identical alerts this row stands for once compacted into a digest
+    repeat_count = Column(Integer, nullable=False, default=1, server_default=text('1'))
     
     # Relationships
     user = relationship("User", back_populates="alerts")
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.database import Base
+from datetime import datetime
+
+class AlertArchive(Base):
+    """Read alerts moved out of the alerts table by the retention job"""
+    __tablename__ = "alerts_archive"
+    
+    id = Column(Integer, primary_key=True)  # original alert id
+    user_id = Column(Integer, index=True)
+    title = Column(String)
+    message = Column(Text)
+    alert_type = Column(String)
+    created_at = Column(DateTime)
+    source_type = Column(String, nullable=True)
+    source_id = Column(Integer, nullable=True)
+    period = Column(String, nullable=True)
+    threshold = Column(Integer, nullable=True)
+    repeat_count = Column(Integer, nullable=False, default=1)
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from app.database import Base
+
+class AlertCounter(Base):
+    """Per-user unread alert count, maintained on every alert write"""
+    __tablename__ = "alert_counters"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
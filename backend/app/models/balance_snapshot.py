@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Date, Numeric, ForeignKey
+from app.database import Base
+
+class AccountBalanceSnapshot(Base):
+    """End-of-day balance of an account, written by the daily snapshot job"""
+    __tablename__ = "account_balance_snapshots"
+    
+    account_id = Column(Integer, ForeignKey("accounts.id"), primary_key=True)
+    day = Column(Date, primary_key=True)  # local day in the owner's timezone
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    balance = Column(Numeric(14, 2), nullable=False)
+
+class NetWorthSnapshot(Base):
+    """End-of-day net worth (sum of account balances) of a user"""
+    __tablename__ = "net_worth_snapshots"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    net_worth = Column(Numeric(14, 2), nullable=False)
+    account_count = Column(Integer, nullable=False, default=0)
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
 
 class Bill(Base):
     __tablename__ = "bills"
+    __table_args__ = (
+        # Due-date range scans over unpaid bills only (reminder engine)
+        Index('ix_bills_unpaid_due', 'due_date', postgresql_where=text('is_paid = false')),
+        # Per-user listing in due-date order
+        Index('ix_bills_user_due', 'user_id', 'due_date'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -6,6 +6,7 @@ class Budget(Base):
     __tablename__ = "budgets"
     __table_args__ = (
         UniqueConstraint('user_id', 'category', 'month', name='uq_budget_user_category_month'),
+        Index('ix_budgets_user_month', 'user_id', 'month'),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+from datetime import datetime
+
+class CacheEpoch(Base):
+    """Shared invalidation counter for in-process caches, bumped by scripts and jobs"""
+    __tablename__ = "cache_epochs"
+    
+    name = Column(String, primary_key=True)  # e.g. "insights"
+    epoch = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
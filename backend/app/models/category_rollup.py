@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey
+from app.database import Base
+
+class CategoryMonthlyRollup(Base):
+    """Per-user monthly category totals, maintained on every transaction write"""
+    __tablename__ = "category_monthly_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(String, primary_key=True)  # e.g., "2024-01"
+    category = Column(String, primary_key=True)  # "" for uncategorized transactions
+    debit_total = Column(Numeric(14, 2), nullable=False, default=0)  # sum of |amount| for amount < 0
+    credit_total = Column(Numeric(14, 2), nullable=False, default=0)  # sum of amount for amount > 0
+    txn_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Index
+from app.database import Base
+from datetime import datetime
+
+class JobRun(Base):
+    """One execution of a scheduled background job, with its metrics"""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        Index('ix_job_runs_job_started', 'job_name', 'started_at'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String, nullable=False)  # e.g. "budget_breach_scan"
+    status = Column(String, nullable=False, default="running")  # running, success, failed
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    elapsed_ms = Column(Float, nullable=True)
+    rows_affected = Column(Integer, nullable=True)  # job-specific count, e.g. alerts created
+    details = Column(Text, nullable=True)  # JSON-encoded job result or error message
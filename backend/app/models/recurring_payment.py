@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Float, Numeric, ForeignKey, DateTime, Index
+from app.database import Base
+from datetime import datetime
+
+class RecurringPayment(Base):
+    """
+    Periodicity stats of one normalized merchant of a user, kept by the recurring
+    payment detector; recurring ones are proposed as bills
+    """
+    __tablename__ = "recurring_payments"
+    __table_args__ = (
+        Index('ux_recurring_payments_user_merchant', 'user_id', 'merchant', unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    merchant = Column(String, nullable=False)  # normalized description, e.g. "netflix subscription"
+    category = Column(String, nullable=True)
+    occurrences = Column(Integer, nullable=False, default=0)
+    last_transaction_id = Column(Integer, nullable=False)  # newest transaction included in the stats
+    interval_days = Column(Float, nullable=True)  # median days between payments
+    interval_deviation = Column(Float, nullable=True)  # median absolute deviation / interval
+    amount = Column(Numeric(12, 2), nullable=True)  # median payment amount
+    amount_cv = Column(Float, nullable=True)  # coefficient of variation of the amounts
+    last_seen = Column(DateTime(timezone=True), nullable=True)
+    next_due = Column(DateTime(timezone=True), nullable=True)
+    status = Column(String, nullable=False, default="candidate")  # candidate, proposed, accepted, dismissed
+    bill_id = Column(Integer, ForeignKey("bills.id"), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,9 +6,20 @@ from datetime import datetime
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Covers month-range aggregates per account without touching the heap
+        Index('ix_transactions_account_created', 'account_id', 'created_at',
+              postgresql_include=['amount', 'category']),
+        # Per-user month ranges and per-(user, category) budget sums, without going through accounts
+        Index('ix_transactions_user_created', 'user_id', 'created_at',
+              postgresql_include=['amount', 'category']),
+        Index('ix_transactions_user_category_created', 'user_id', 'category', 'created_at',
+              postgresql_include=['amount']),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # denormalized from accounts.user_id
     description = Column(String)
     category = Column(String, nullable=True, index=True)
     amount = Column(Numeric(12, 2))  # NUMERIC for financial precision
@@ -11,6 +11,7 @@ class User(Base):
     password = Column(String)
     phone = Column(String)
     kyc_status = Column(String, default="Pending")
+    timezone = Column(String, nullable=True)  # IANA name, e.g. "Asia/Kolkata"; app default when unset
     
     # Relationships
     accounts = relationship("Account", back_populates="user")
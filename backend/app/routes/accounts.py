@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import func, and_
 from app.database import get_db
-from app.models import Account
-from app.schemas import AccountCreate, AccountResponse
+from app.models import Account, Transaction
+from app.schemas import AccountCreate, AccountResponse, AccountSummary
+from app.services.periods import get_user_timezone, month_bounds, current_month
+from app.services.balance_snapshots import BalanceSnapshotService
+from datetime import datetime, timedelta
 
 router = APIRouter()
 
@@ -28,6 +32,87 @@ def create_account(account: AccountCreate, db: Session = Depends(get_db)):
     db.refresh(new_account)
     return new_account
 
+@router.get("/summary", response_model=list[AccountSummary])
+def get_accounts_summary(
+    user_id: int = Query(1, description="User ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    All accounts of a user with transaction count, last activity and month-to-date
+    money in/out, from one grouped query (month in the user's timezone)
+    """
+    tz = get_user_timezone(db, user_id)
+    month_start = month_bounds(current_month(tz), tz)[0]
+    this_month = Transaction.created_at >= month_start
+    amount = Transaction.amount
+    
+    rows = db.query(
+        Account,
+        func.count(Transaction.id).label('txn_count'),
+        func.max(Transaction.created_at).label('last_activity'),
+        func.coalesce(func.sum(amount).filter(and_(this_month, amount > 0)), 0).label('month_in'),
+        func.coalesce(func.sum(-amount).filter(and_(this_month, amount < 0)), 0).label('month_out')
+    ).outerjoin(
+        Transaction, Transaction.account_id == Account.id
+    ).filter(
+        Account.user_id == user_id
+    ).group_by(Account.id).order_by(Account.id).all()
+    
+    return [
+        AccountSummary(
+            id=account.id,
+            user_id=account.user_id,
+            bank_name=account.bank_name,
+            account_type=account.account_type,
+            balance=account.balance,
+            txn_count=txn_count,
+            last_activity=last_activity,
+            month_in=round(float(month_in), 2),
+            month_out=round(float(month_out), 2)
+        )
+        for account, txn_count, last_activity, month_in, month_out in rows
+    ]
+
+@router.get("/net-worth")
+def get_net_worth_history(
+    user_id: int = Query(1, description="User ID"),
+    days: int = Query(BalanceSnapshotService.DEFAULT_DAYS, ge=1, le=3660, description="Days of history"),
+    db: Session = Depends(get_db)
+):
+    """Daily net worth series for the last days, read from net_worth_snapshots"""
+    end = datetime.now(get_user_timezone(db, user_id)).date()
+    start = end - timedelta(days=days - 1)
+    return {
+        "start": start,
+        "end": end,
+        "series": BalanceSnapshotService(db).get_net_worth_series(user_id, start, end)
+    }
+
+@router.get("/{account_id}/balance-history")
+def get_balance_history(
+    account_id: int,
+    user_id: int = Query(1),
+    days: int = Query(BalanceSnapshotService.DEFAULT_DAYS, ge=1, le=3660, description="Days of history"),
+    db: Session = Depends(get_db)
+):
+    """Daily end-of-day balance series of an account, read from account_balance_snapshots"""
+    account = db.query(Account.id).filter(
+        Account.id == account_id,
+        Account.user_id == user_id
+    ).first()
+    
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    
+    end = datetime.now(get_user_timezone(db, user_id)).date()
+    start = end - timedelta(days=days - 1)
+    return {
+        "account_id": account_id,
+        "start": start,
+        "end": end,
+        "series": BalanceSnapshotService(db).get_account_series(user_id, account_id, start, end)
+    }
+
 @router.get("/{account_id}", response_model=AccountResponse)
 def get_account(
     account_id: int,
@@ -1,36 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models import Alert
 from app.schemas import AlertCreate, AlertResponse
+from app.services.alert_service import AlertService
+from app.services.alert_hub import alert_hub
+from typing import Optional
+import asyncio
+import json
 
 router = APIRouter()
 
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT_SECONDS = 15
+# Most alerts replayed to a reconnecting stream
+STREAM_REPLAY_LIMIT = 100
+
 @router.get("/", response_model=list[AlertResponse])
 def get_alerts(
+    response: Response,
     user_id: int = Query(1, description="User ID"),
     unread_only: bool = Query(False, description="Show only unread alerts"),
+    alert_type: Optional[str] = Query(None, description="Only alerts of this type"),
+    limit: int = Query(AlertService.DEFAULT_PAGE_SIZE, ge=1, le=AlertService.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
     db: Session = Depends(get_db)
 ):
-    """Get all alerts for a user"""
-    query = db.query(Alert).filter(Alert.user_id == user_id)
-    
-    if unread_only:
-        query = query.filter(Alert.is_read == False)
+    """
+    Get a page of alerts for a user, newest first
+    When more alerts exist, the cursor for the next page is returned in the X-Next-Cursor header
+    """
+    try:
+        alerts, next_cursor = AlertService(db).get_alerts_page(
+            user_id, unread_only=unread_only, alert_type=alert_type, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return query.order_by(Alert.created_at.desc()).all()
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return alerts
 
 @router.post("/", response_model=AlertResponse)
 def create_alert(alert: AlertCreate, db: Session = Depends(get_db)):
     """Create a new alert"""
-    new_alert = Alert(
+    new_alert = AlertService(db).create_alert(
         user_id=alert.user_id,
         title=alert.title,
         message=alert.message,
-        alert_type=alert.alert_type,
-        is_read=False
+        alert_type=alert.alert_type
     )
-    db.add(new_alert)
     db.commit()
     db.refresh(new_alert)
     return new_alert
@@ -42,16 +63,11 @@ def mark_alert_as_read(
     db: Session = Depends(get_db)
 ):
     """Mark an alert as read"""
-    alert = db.query(Alert).filter(
-        Alert.id == alert_id,
-        Alert.user_id == user_id
-    ).first()
+    alert = AlertService(db).mark_as_read(alert_id, user_id)
     
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    alert.is_read = True
-    db.commit()
     return {"message": "Alert marked as read"}
 
 @router.patch("/mark-all-read")
@@ -60,11 +76,7 @@ def mark_all_alerts_as_read(
     db: Session = Depends(get_db)
 ):
     """Mark all alerts as read for a user"""
-    db.query(Alert).filter(
-        Alert.user_id == user_id,
-        Alert.is_read == False
-    ).update({"is_read": True})
-    db.commit()
+    AlertService(db).mark_all_as_read(user_id)
     return {"message": "All alerts marked as read"}
 
 @router.delete("/{alert_id}")
@@ -74,16 +86,9 @@ def delete_alert(
     db: Session = Depends(get_db)
 ):
     """Delete an alert"""
-    alert = db.query(Alert).filter(
-        Alert.id == alert_id,
-        Alert.user_id == user_id
-    ).first()
-    
-    if not alert:
+    if not AlertService(db).delete_alert(alert_id, user_id):
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    db.delete(alert)
-    db.commit()
     return {"message": "Alert deleted successfully"}
 
 @router.get("/unread-count")
@@ -91,9 +96,72 @@ def get_unread_count(
     user_id: int = Query(1),
     db: Session = Depends(get_db)
 ):
-    """Get count of unread alerts"""
-    count = db.query(Alert).filter(
-        Alert.user_id == user_id,
-        Alert.is_read == False
-    ).count()
-    return {"unread_count": count}
+    """Get count of unread alerts (served from the write-maintained counter)"""
+    return {"unread_count": AlertService(db).get_unread_count(user_id)}
+
+
+def _replay_alerts(user_id: int, after_id: int) -> list:
+    """Alerts created after a given id, for resuming a stream (own session: runs off the event loop)"""
+    db = SessionLocal()
+    try:
+        alerts = db.query(Alert).filter(
+            Alert.user_id == user_id,
+            Alert.id > after_id
+        ).order_by(Alert.id).limit(STREAM_REPLAY_LIMIT).all()
+        return [
+            AlertService.alert_event(a.id, a.user_id, a.title, a.message, a.alert_type, a.is_read, a.created_at)
+            for a in alerts
+        ]
+    finally:
+        db.close()
+
+
+def _sse_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: alert\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    user_id: int = Query(1),
+    last_event_id: Optional[int] = Query(None, description="Resume after this alert id"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events stream of new alerts for a user
+    Each event carries the alert id, so reconnecting clients (EventSource sends
+    Last-Event-ID automatically) get the alerts they missed replayed first
+    """
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+
+    # Subscribe before replaying so nothing committed in between is lost
+    subscription = alert_hub.subscribe(user_id)
+
+    async def events():
+        sent_id = last_event_id or 0
+        try:
+            yield "retry: 5000\n\n"
+            if last_event_id is not None:
+                for event in await run_in_threadpool(_replay_alerts, user_id, last_event_id):
+                    sent_id = max(sent_id, event["id"])
+                    yield _sse_event(event)
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if event["id"] <= sent_id:
+                    continue
+                sent_id = event["id"]
+                yield _sse_event(event)
+        finally:
+            alert_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import Bill
-from app.schemas import BillCreate, BillResponse
+from app.schemas import BillCreate, BillResponse, RecurringPaymentResponse
+from app.services.recurring_detector import RecurringDetector
 
 router = APIRouter()
 
@@ -36,6 +37,40 @@ def create_bill(bill: BillCreate, db: Session = Depends(get_db)):
     db.refresh(new_bill)
     return new_bill
 
+@router.get("/suggestions", response_model=list[RecurringPaymentResponse])
+def get_bill_suggestions(
+    user_id: int = Query(1, description="User ID"),
+    db: Session = Depends(get_db)
+):
+    """Recurring payments detected in the user's transactions that could become bills"""
+    return RecurringDetector(db).get_suggestions(user_id)
+
+@router.post("/suggestions/{payment_id}/accept", response_model=BillResponse)
+def accept_bill_suggestion(
+    payment_id: int,
+    user_id: int = Query(1),
+    db: Session = Depends(get_db)
+):
+    """Create a bill from a suggested recurring payment"""
+    bill = RecurringDetector(db).accept(user_id, payment_id)
+    
+    if not bill:
+        raise HTTPException(status_code=404, detail="Suggestion not found")
+    
+    return bill
+
+@router.post("/suggestions/{payment_id}/dismiss")
+def dismiss_bill_suggestion(
+    payment_id: int,
+    user_id: int = Query(1),
+    db: Session = Depends(get_db)
+):
+    """Stop suggesting a recurring payment"""
+    if not RecurringDetector(db).dismiss(user_id, payment_id):
+        raise HTTPException(status_code=404, detail="Suggestion not found")
+    
+    return {"message": "Suggestion dismissed"}
+
 @router.patch("/{bill_id}/pay")
 def pay_bill(
     bill_id: int,
@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from typing import Optional
 from app.database import get_db
-from app.models import Budget, Transaction, Account, Alert
+from app.models import Budget
 from app.schemas import BudgetCreate, BudgetResponse, BudgetUpdate
-from app.schemas.budget import BudgetWithProgress
+from app.schemas.budget import BudgetWithProgress, BudgetForecast
+from app.services.budget_service import BudgetService
+from app.services.budget_evaluator import BudgetEvaluator
+from app.services.budget_forecast import BudgetForecaster
+from app.services.periods import current_month, parse_month
 
 router = APIRouter()
 
@@ -23,58 +27,27 @@ def get_budgets(
     
     budgets = query.all()
     
-    # Calculate spending and progress for each budget
+    # Read-only: spent_amount is maintained and alerts are raised on transaction writes
     result = []
     for budget in budgets:
-        # Get accounts for this user
-        accounts = db.query(Account).filter(Account.user_id == user_id).all()
-        account_ids = [a.id for a in accounts]
-        
-        # Calculate spent amount for this category in the month (only debit/negative amounts)
-        spent = db.query(func.coalesce(func.sum(func.abs(Transaction.amount)), 0)).filter(
-            Transaction.account_id.in_(account_ids),
-            Transaction.category == budget.category,
-            Transaction.amount < 0,  # Only count expenses (negative amounts)
-            func.to_char(Transaction.created_at, 'YYYY-MM') == month if month else True
-        ).scalar() or 0
-        
-        # Update spent_amount in budget
-        budget.spent_amount = float(spent)
+        spent = float(budget.spent_amount or 0)
+        limit_amount = float(budget.limit_amount or 0)
         
         # Calculate progress
-        if budget.limit_amount > 0:
-            progress_percentage = (float(spent) / budget.limit_amount) * 100
+        if limit_amount > 0:
+            progress_percentage = (spent / limit_amount) * 100
         else:
             progress_percentage = 0
         
-        is_over_budget = float(spent) > budget.limit_amount
-        remaining_amount = budget.limit_amount - float(spent)
-        
-        # Check for overspending and create alert if needed
-        if is_over_budget:
-            # Check if alert already exists
-            existing_alert = db.query(Alert).filter(
-                Alert.user_id == user_id,
-                Alert.alert_type == "budget_exceeded",
-                Alert.title.like(f"%{budget.category}%")
-            ).first()
-            
-            if not existing_alert:
-                new_alert = Alert(
-                    user_id=user_id,
-                    title=f"Budget Exceeded: {budget.category}",
-                    message=f"You've exceeded your monthly budget for {budget.category}. Spent: ₹{spent:.2f}, Limit: ₹{budget.limit_amount:.2f}",
-                    alert_type="budget_exceeded"
-                )
-                db.add(new_alert)
-                db.commit()
+        is_over_budget = spent > limit_amount
+        remaining_amount = limit_amount - spent
         
         budget_with_progress = BudgetWithProgress(
             id=budget.id,
             user_id=budget.user_id,
             category=budget.category,
             limit_amount=budget.limit_amount,
-            spent_amount=float(spent),
+            spent_amount=spent,
             month=budget.month,
             progress_percentage=round(progress_percentage, 2),
             is_over_budget=is_over_budget,
@@ -84,31 +57,71 @@ def get_budgets(
     
     return result
 
+@router.get("/forecast", response_model=list[BudgetForecast])
+def get_budget_forecast(
+    user_id: int = Query(1, description="User ID"),
+    month: Optional[str] = Query(None, description="Month in YYYY-MM format (defaults to current month)"),
+    db: Session = Depends(get_db)
+):
+    """Project month-end spending, burn rate and overshoot date for every budget"""
+    try:
+        return BudgetForecaster(db).forecast(user_id, month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/", response_model=BudgetResponse)
 def create_budget(budget: BudgetCreate, db: Session = Depends(get_db)):
     """Create a new budget"""
-    # Check if budget already exists for this category and month
-    existing = db.query(Budget).filter(
-        Budget.user_id == budget.user_id,
-        Budget.category == budget.category,
-        Budget.month == budget.month
-    ).first()
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="Budget already exists for this category and month")
+    # Seed spent_amount once; transaction writes keep it current afterwards
+    spent_amount = BudgetService(db).calculate_month_spending(budget.user_id, budget.category, budget.month)
     
     new_budget = Budget(
         user_id=budget.user_id,
         category=budget.category,
         limit_amount=budget.limit_amount,
-        spent_amount=0,
+        spent_amount=spent_amount,
         month=budget.month
     )
     db.add(new_budget)
+    try:
+        # uq_budget_user_category_month settles concurrent creates
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Budget already exists for this category and month")
+    
+    # Existing spending may already cross an alert threshold
+    BudgetEvaluator(db).evaluate_budget(new_budget)
+    
     db.commit()
     db.refresh(new_budget)
     return new_budget
 
+@router.post("/bulk")
+def bulk_upsert_budgets(budgets: list[BudgetCreate], db: Session = Depends(get_db)):
+    """Create or update many budgets in one statement (limits of existing budgets are replaced)"""
+    try:
+        return BudgetService(db).bulk_upsert_budgets([b.model_dump() for b in budgets])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/rollover")
+def rollover_budgets(
+    from_month: str = Query(..., description="Source month in YYYY-MM format"),
+    to_month: str = Query(..., description="Target month in YYYY-MM format"),
+    user_id: Optional[int] = Query(None, description="Only roll over this user's budgets (default: all users)"),
+    db: Session = Depends(get_db)
+):
+    """Copy budgets from one month to the next with a single INSERT ... SELECT"""
+    try:
+        parse_month(from_month)
+        parse_month(to_month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    created = BudgetService(db).rollover_budgets(from_month, to_month, user_id=user_id)
+    return {"message": f"Rolled over {created} budgets", "created": created}
+
 @router.put("/{budget_id}", response_model=BudgetResponse)
 def update_budget(budget_id: int, budget: BudgetUpdate, user_id: int = Query(1), db: Session = Depends(get_db)):
     """Update an existing budget"""
@@ -127,6 +140,21 @@ def update_budget(budget_id: int, budget: BudgetUpdate, user_id: int = Query(1),
     if budget.month is not None:
         db_budget.month = budget.month
     
+    # A budget that now covers a different category or month needs a fresh total
+    if budget.category is not None or budget.month is not None:
+        db_budget.spent_amount = BudgetService(db).calculate_month_spending(
+            user_id, db_budget.category, db_budget.month
+        )
+    
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Budget already exists for this category and month")
+    
+    # A lower limit or a different category/month can cross a threshold
+    BudgetEvaluator(db).evaluate_budget(db_budget)
+    
     db.commit()
     db.refresh(db_budget)
     return db_budget
@@ -148,26 +176,18 @@ def delete_budget(budget_id: int, user_id: int = Query(1), db: Session = Depends
 
 @router.post("/recalculate")
 def recalculate_budgets(user_id: int = Query(1), month: Optional[str] = None, db: Session = Depends(get_db)):
-    """Recalculate all budget spending for a user"""
-    budgets = db.query(Budget).filter(Budget.user_id == user_id).all()
-    
-    if month:
-        budgets = [b for b in budgets if b.month == month]
-    
-    updated = 0
-    for budget in budgets:
-        accounts = db.query(Account).filter(Account.user_id == user_id).all()
-        account_ids = [a.id for a in accounts]
-        
-        spent = db.query(func.coalesce(func.sum(func.abs(Transaction.amount)), 0)).filter(
-            Transaction.account_id.in_(account_ids),
-            Transaction.category == budget.category,
-            Transaction.amount < 0,
-            func.to_char(Transaction.created_at, 'YYYY-MM') == budget.month
-        ).scalar() or 0
-        
-        budget.spent_amount = float(spent)
-        db.commit()
-        updated += 1
-    
-    return {"message": f"Recalculated {updated} budgets"}
+    """Reconcile stored budget spending for a user against their transactions"""
+    drift = BudgetService(db).reconcile_spent_amounts(user_id=user_id, month=month)
+    return {"message": f"Reconciled budgets, corrected {len(drift)}", "corrected": drift}
+
+@router.post("/recalculate-all")
+def recalculate_all_users_budgets(
+    month: Optional[str] = Query(None, description="Month in YYYY-MM format (defaults to current month)"),
+    chunk_size: Optional[int] = Query(None, ge=1, description="Users per UPDATE statement"),
+    db: Session = Depends(get_db)
+):
+    """Set-based refresh of spent_amount for every budget of every user in a month"""
+    try:
+        return BudgetService(db).recompute_month(month or current_month(), chunk_size=chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional
+from typing import List, Optional
+from datetime import date
 from app.database import get_db
-from app.models import Transaction, Account
+from app.services.rollup_service import RollupService
+from app.services.budget_service import BudgetService
+from app.services.alert_service import AlertService
+from app.services.periods import get_user_timezone, current_month, parse_month, shift_month
+from app.services.insights_cache import insights_cache
+from app.services.cashflow_service import CashflowService
+from app.services.transaction_snapshot import transaction_snapshots
 
 router = APIRouter()
 
@@ -14,33 +20,16 @@ def get_spending_by_category(
     db: Session = Depends(get_db)
 ):
     """Get spending by category for a user, optionally filtered by month"""
-    # Get accounts for the user
-    accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    account_ids = [a.id for a in accounts]
-    
-    if not account_ids:
-        return []
-    
-    # Base query for transactions - expenses are negative amounts
-    query = db.query(
-        Transaction.category,
-        func.sum(func.abs(Transaction.amount)).label('amount')
-    ).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.amount < 0  # Expenses (negative amounts)
-    )
-    
-    # Filter by month if provided
-    if month:
-        query = query.filter(func.to_char(Transaction.created_at, 'YYYY-MM') == month)
-    
-    # Group by category
-    results = query.group_by(Transaction.category).all()
-    
-    return [
-        {"category": r.category or "Uncategorized", "amount": float(r.amount)}
-        for r in results
-    ]
+    def compute():
+        # Read pre-aggregated monthly category totals (expenses are debit totals)
+        totals = RollupService(db).get_category_totals(user_id, month)
+        return [
+            {"category": RollupService.category_label(t["category"]), "amount": t["debit_total"]}
+            for t in totals
+            if t["debit_total"] > 0
+        ]
+    
+    return insights_cache.get_or_compute(user_id, "spending-by-category", {"month": month}, compute)
 
 @router.get("/income-by-category")
 def get_income_by_category(
@@ -49,33 +38,16 @@ def get_income_by_category(
     db: Session = Depends(get_db)
 ):
     """Get income by category for a user, optionally filtered by month"""
-    # Get accounts for the user
-    accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    account_ids = [a.id for a in accounts]
-    
-    if not account_ids:
-        return []
-    
-    # Base query for transactions - income are positive amounts
-    query = db.query(
-        Transaction.category,
-        func.sum(Transaction.amount).label('amount')
-    ).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.amount > 0  # Income (positive amounts)
-    )
-    
-    # Filter by month if provided
-    if month:
-        query = query.filter(func.to_char(Transaction.created_at, 'YYYY-MM') == month)
-    
-    # Group by category
-    results = query.group_by(Transaction.category).all()
-    
-    return [
-        {"category": r.category or "Uncategorized", "amount": float(r.amount)}
-        for r in results
-    ]
+    def compute():
+        # Read pre-aggregated monthly category totals (income are credit totals)
+        totals = RollupService(db).get_category_totals(user_id, month)
+        return [
+            {"category": RollupService.category_label(t["category"]), "amount": t["credit_total"]}
+            for t in totals
+            if t["credit_total"] > 0
+        ]
+    
+    return insights_cache.get_or_compute(user_id, "income-by-category", {"month": month}, compute)
 
 @router.get("/monthly-summary")
 def get_monthly_summary(
@@ -84,70 +56,147 @@ def get_monthly_summary(
     db: Session = Depends(get_db)
 ):
     """Get monthly summary including total income, expenses, and balance"""
-    # Get accounts for the user
-    accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    account_ids = [a.id for a in accounts]
-    
-    if not account_ids:
-        return {"total_income": 0, "total_expense": 0, "balance": 0}
-    
-    # Get total income (positive amounts)
-    income_query = db.query(func.coalesce(func.sum(Transaction.amount), 0)).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.amount > 0
-    )
-    
-    # Get total expenses (negative amounts)
-    expense_query = db.query(func.coalesce(func.sum(func.abs(Transaction.amount)), 0)).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.amount < 0
-    )
-    
-    # Filter by month if provided
-    if month:
-        income_query = income_query.filter(func.to_char(Transaction.created_at, 'YYYY-MM') == month)
-        expense_query = expense_query.filter(func.to_char(Transaction.created_at, 'YYYY-MM') == month)
-    
-    total_income = float(income_query.scalar() or 0)
-    total_expense = float(expense_query.scalar() or 0)
-    
-    return {
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "balance": total_income - total_expense,
-        "month": month
-    }
+    def compute():
+        totals = RollupService(db).get_totals(user_id, month)
+        total_income = totals["credit_total"]
+        total_expense = totals["debit_total"]
+        return {
+            "total_income": total_income,
+            "total_expense": total_expense,
+            "balance": total_income - total_expense,
+            "month": month
+        }
+    
+    return insights_cache.get_or_compute(user_id, "monthly-summary", {"month": month}, compute)
 
 @router.get("/category-trend")
 def get_category_trend(
     user_id: int = Query(1, description="User ID"),
     category: str = Query(..., description="Category to get trend for"),
-    months: int = Query(6, description="Number of months to look back"),
+    months: int = Query(6, ge=1, le=120, description="Number of months to look back"),
     db: Session = Depends(get_db)
 ):
-    """Get spending trend for a specific category over time"""
-    # Get accounts for the user
-    accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    account_ids = [a.id for a in accounts]
-    
-    if not account_ids:
-        return []
+    """Get spending trend for a specific category over time (newest month first, zero-filled)"""
+    return insights_cache.get_or_compute(
+        user_id, "category-trend", {"category": category, "months": months},
+        lambda: RollupService(db).get_category_trend(user_id, category, months)
+    )
+
+@router.get("/category-trends")
+def get_category_trends(
+    user_id: int = Query(1, description="User ID"),
+    categories: List[str] = Query(..., description="Categories to chart (repeat the parameter)"),
+    months: int = Query(6, ge=1, le=120, description="Number of months in the window"),
+    end_month: Optional[str] = Query(None, description="Last month of the window in YYYY-MM format (defaults to current month)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Monthly spending for several categories at once, one value per month per
+    category (0 for months without spending), oldest month first
+    """
+    if end_month is not None:
+        try:
+            parse_month(end_month)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return insights_cache.get_or_compute(
+        user_id, "category-trends",
+        {"categories": tuple(categories), "months": months, "end_month": end_month},
+        lambda: RollupService(db).get_category_trends(user_id, categories, months, end_month)
+    )
+
+@router.get("/dashboard")
+def get_dashboard(
+    user_id: int = Query(1, description="User ID"),
+    month: Optional[str] = Query(None, description="Month in YYYY-MM format (defaults to the current month)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Everything the dashboard shows in one response: monthly summary with the
+    previous month for comparison, spending and income by category, budgets and
+    the unread alert count
+    """
+    if month is None:
+        month = current_month(get_user_timezone(db, user_id))
+    try:
+        parse_month(month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    dashboard = insights_cache.get_or_compute(
+        user_id, "dashboard", {"month": month},
+        lambda: _build_dashboard(db, user_id, month)
+    )
+    # Alerts aren't part of the cached data version; the counter is a primary-key read
+    return {**dashboard, "unread_alerts": AlertService(db).get_unread_count(user_id)}
+
+@router.get("/cashflow")
+def get_cashflow(
+    user_id: int = Query(1, description="User ID"),
+    start: date = Query(..., description="First day (YYYY-MM-DD)"),
+    end: date = Query(..., description="Last day, inclusive (YYYY-MM-DD)"),
+    interval: str = Query("day", description="day, week or month"),
+    points: int = Query(CashflowService.DEFAULT_MAX_POINTS, ge=1, le=2000, description="Maximum number of points"),
+    db: Session = Depends(get_db)
+):
+    """
+    Income vs expense time series; ranges that would exceed the point budget
+    are downsampled server-side into fixed-width buckets
+    """
+    try:
+        return insights_cache.get_or_compute(
+            user_id, "cashflow",
+            {"start": start, "end": end, "interval": interval, "points": points},
+            lambda: CashflowService(db).get_series(user_id, start, end, interval, points)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    """Hit/miss counters of the insights result cache and transaction snapshots"""
+    return {
+        "results": insights_cache.stats(),
+        "snapshots": transaction_snapshots.stats()
+    }
+
+def _build_dashboard(db: Session, user_id: int, month: str) -> dict:
+    previous_month = shift_month(month, -1)
     
-    # Get spending by month for the category (expenses are negative)
-    results = db.query(
-        func.to_char(Transaction.created_at, 'YYYY-MM').label('month'),
-        func.sum(func.abs(Transaction.amount)).label('amount')
-    ).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.category == category,
-        Transaction.amount < 0
-    ).group_by(
-        func.to_char(Transaction.created_at, 'YYYY-MM')
-    ).order_by(
-        func.to_char(Transaction.created_at, 'YYYY-MM').desc()
-    ).limit(months).all()
+    overview = RollupService(db).get_month_overview(user_id, month, previous_month)
+    categories = overview["categories"]
+    total_income = overview["total_income"]
+    total_expense = overview["total_expense"]
+    previous_expense = overview["previous_expense"]
     
-    return [
-        {"month": r.month, "amount": float(r.amount)}
-        for r in results
-    ]
+    return {
+        "month": month,
+        "summary": {
+            "total_income": total_income,
+            "total_expense": total_expense,
+            "balance": total_income - total_expense,
+            "txn_count": overview["txn_count"],
+            "previous_income": overview["previous_income"],
+            "previous_expense": previous_expense,
+            "expense_change_percentage": round((total_expense - previous_expense) / previous_expense * 100, 2)
+            if previous_expense > 0 else None
+        },
+        "spending_by_category": sorted(
+            [
+                {"category": RollupService.category_label(c["category"]), "amount": c["expense"], "txn_count": c["txn_count"]}
+                for c in categories
+                if c["expense"] > 0
+            ],
+            key=lambda c: c["amount"], reverse=True
+        ),
+        "income_by_category": sorted(
+            [
+                {"category": RollupService.category_label(c["category"]), "amount": c["income"]}
+                for c in categories
+                if c["income"] > 0
+            ],
+            key=lambda c: c["amount"], reverse=True
+        ),
+        "budgets": BudgetService(db).get_all_budgets_with_progress(user_id, month)
+    }
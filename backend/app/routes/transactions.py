@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import Transaction, CategoryRule, Account
+from app.models import Transaction, CategoryRule
 from app.schemas import TransactionCreate, TransactionResponse, TransactionUpdate
+from app.services.spending_tracker import SpendingTracker
 from typing import Optional
 
 router = APIRouter()
@@ -39,14 +40,7 @@ def get_transactions(
     db: Session = Depends(get_db)
 ):
     """Get all transactions for a user, optionally filtered with pagination"""
-    # Get accounts for the user
-    accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    account_ids = [a.id for a in accounts]
-    
-    if not account_ids:
-        return []
-    
-    query = db.query(Transaction).filter(Transaction.account_id.in_(account_ids))
+    query = db.query(Transaction).filter(Transaction.user_id == user_id)
     
     if account_id:
         query = query.filter(Transaction.account_id == account_id)
@@ -67,14 +61,7 @@ def get_transactions_count(
     db: Session = Depends(get_db)
 ):
     """Get total count of transactions for pagination"""
-    # Get accounts for the user
-    accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    account_ids = [a.id for a in accounts]
-    
-    if not account_ids:
-        return {"total": 0}
-    
-    query = db.query(Transaction).filter(Transaction.account_id.in_(account_ids))
+    query = db.query(Transaction).filter(Transaction.user_id == user_id)
     
     if account_id:
         query = query.filter(Transaction.account_id == account_id)
@@ -93,13 +80,26 @@ def create_transaction(txn: TransactionCreate, db: Session = Depends(get_db)):
     if not category:
         category = auto_categorize_transaction(txn.description, db)
     
+    tracker = SpendingTracker(db)
+    user_id = tracker.get_account_owner(txn.account_id)
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    
     new_txn = Transaction(
         account_id=txn.account_id,
+        user_id=user_id,
         description=txn.description,
         amount=txn.amount,
         category=category
     )
     db.add(new_txn)
+    db.flush()
+    db.refresh(new_txn)  # load server-side created_at for the budget month
+    
+    # Update budget spending in the same DB transaction
+    tracker.record_insert(new_txn, user_id)
+    tracker.apply()
+    
     db.commit()
     db.refresh(new_txn)
     return new_txn
@@ -117,9 +117,16 @@ def update_transaction_category(
         raise HTTPException(status_code=404, detail="Transaction not found")
     
     if update_data.category is not None:
+        tracker = SpendingTracker(db)
+        user_id = txn.user_id or tracker.get_account_owner(txn.account_id)
         old_category = txn.category
         txn.category = update_data.category
         
+        # Move the spending between budgets in the same DB transaction
+        if user_id is not None and old_category != txn.category:
+            tracker.record_update(txn, user_id, old_amount=txn.amount, old_category=old_category)
+            tracker.apply()
+        
         # Save as rule if requested
         if save_as_rule and txn.description:
             # Use first word of description as keyword
@@ -130,49 +137,65 @@ def update_transaction_category(
                     CategoryRule.keyword_pattern.ilike(keyword)
                 ).first()
                 
-                if not existing_rule:
-                    # Get user_id from account
-                    account = db.query(Account).filter(Account.id == txn.account_id).first()
-                    if account:
-                        new_rule = CategoryRule(
-                            user_id=account.user_id,
-                            category=update_data.category,
-                            keyword_pattern=keyword,
-                            priority=1,
-                            is_active=True
-                        )
-                        db.add(new_rule)
-                        db.commit()
+                if not existing_rule and user_id is not None:
+                    new_rule = CategoryRule(
+                        user_id=user_id,
+                        category=update_data.category,
+                        keyword_pattern=keyword,
+                        priority=1,
+                        is_active=True
+                    )
+                    db.add(new_rule)
     
     db.commit()
     db.refresh(txn)
     return txn
 
+@router.delete("/{transaction_id}")
+def delete_transaction(
+    transaction_id: int,
+    user_id: int = Query(1),
+    db: Session = Depends(get_db)
+):
+    """Delete a transaction and release its spending from the matching budget"""
+    txn = db.query(Transaction).filter(
+        Transaction.id == transaction_id,
+        Transaction.user_id == user_id
+    ).first()
+    
+    if not txn:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    
+    tracker = SpendingTracker(db)
+    tracker.record_delete(txn, user_id)
+    tracker.apply()
+    
+    db.delete(txn)
+    db.commit()
+    return {"message": "Transaction deleted successfully"}
+
 @router.post("/categorize-all")
 def categorize_all_transactions(
     user_id: int = Query(1),
     db: Session = Depends(get_db)
 ):
     """Apply auto-categorization to all uncategorized transactions"""
-    # Get accounts for the user
-    accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    account_ids = [a.id for a in accounts]
-    
-    if not account_ids:
-        return {"message": "No accounts found"}
-    
     transactions = db.query(Transaction).filter(
-        Transaction.account_id.in_(account_ids),
+        Transaction.user_id == user_id,
         Transaction.category == None
     ).all()
     
+    tracker = SpendingTracker(db)
     count = 0
     for txn in transactions:
         category = auto_categorize_transaction(txn.description, db)
         if category:
             txn.category = category
+            tracker.record_update(txn, user_id, old_amount=txn.amount, old_category=None)
             count += 1
     
+    # One UPDATE per affected budget, committed with the recategorization
+    tracker.apply()
     db.commit()
     return {"message": f"Categorized {count} transactions"}
 
@@ -182,14 +205,7 @@ def get_uncategorized_transactions(
     db: Session = Depends(get_db)
 ):
     """Get all uncategorized transactions"""
-    # Get accounts for the user
-    accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    account_ids = [a.id for a in accounts]
-    
-    if not account_ids:
-        return []
-    
     return db.query(Transaction).filter(
-        Transaction.account_id.in_(account_ids),
+        Transaction.user_id == user_id,
         Transaction.category == None
     ).order_by(Transaction.created_at.desc()).all()
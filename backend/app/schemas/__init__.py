@@ -1,8 +1,8 @@
 from .user import UserCreate, UserResponse
-from .account import AccountCreate, AccountResponse
+from .account import AccountCreate, AccountResponse, AccountSummary
 from .transaction import TransactionCreate, TransactionResponse, TransactionUpdate
 from .budget import BudgetCreate, BudgetResponse, BudgetUpdate, BudgetWithProgress
-from .bill import BillCreate, BillResponse
+from .bill import BillCreate, BillResponse, RecurringPaymentResponse
 from .reward import RewardCreate, RewardResponse
 from .alert import AlertCreate, AlertResponse
 from .auth import LoginRequest, TokenResponse
@@ -1,4 +1,6 @@
 from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
 
 class AccountBase(BaseModel):
     bank_name: str
@@ -14,3 +16,10 @@ class AccountResponse(AccountBase):
     
     class Config:
         from_attributes = True
+
+class AccountSummary(AccountResponse):
+    """Account with its transaction count, last activity and month-to-date flows"""
+    txn_count: int = 0
+    last_activity: Optional[datetime] = None
+    month_in: float = 0.0
+    month_out: float = 0.0
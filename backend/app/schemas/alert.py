@@ -14,6 +14,7 @@ class AlertResponse(AlertBase):
     user_id: int
     is_read: bool
     created_at: datetime
+    repeat_count: int = 1
     
     class Config:
         from_attributes = True
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class BillBase(BaseModel):
     bill_name: str
@@ -17,3 +18,19 @@ class BillResponse(BillBase):
     
     class Config:
         from_attributes = True
+
+class RecurringPaymentResponse(BaseModel):
+    """Recurring payment detected in transaction history, proposed as a bill"""
+    id: int
+    user_id: int
+    merchant: str
+    category: Optional[str] = None
+    occurrences: int
+    interval_days: Optional[float] = None
+    amount: Optional[float] = None
+    last_seen: Optional[datetime] = None
+    next_due: Optional[datetime] = None
+    status: str
+    
+    class Config:
+        from_attributes = True
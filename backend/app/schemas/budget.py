@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+from datetime import date
 
 class BudgetBase(BaseModel):
     category: str
@@ -30,3 +31,20 @@ class BudgetWithProgress(BudgetResponse):
     
     class Config:
         from_attributes = True
+
+class BudgetForecast(BaseModel):
+    """Month-end spending projection for a budget"""
+    budget_id: int
+    category: str
+    month: str
+    limit_amount: float
+    spent_amount: float
+    days_elapsed: int
+    days_in_month: int
+    burn_rate: float  # average spend per elapsed day
+    projected_spend: float
+    projected_low: float  # lower edge of the ~95% confidence band
+    projected_high: float  # upper edge of the ~95% confidence band
+    projected_overshoot: float  # projected_spend - limit_amount (negative = headroom)
+    will_exceed: bool
+    overshoot_date: Optional[date] = None
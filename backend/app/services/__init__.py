@@ -2,5 +2,15 @@
 from .rule_engine import RuleEngine
 from .budget_service import BudgetService
 from .alert_service import AlertService
+from .spending_tracker import SpendingTracker
+from .rollup_service import RollupService
+from .budget_evaluator import BudgetEvaluator
+from .budget_forecast import BudgetForecaster
+from .alert_retention import AlertRetentionService
+from .cashflow_service import CashflowService
+from .anomaly_detector import AnomalyDetector
+from .balance_snapshots import BalanceSnapshotService
+from .bill_reminders import BillReminderService
+from .recurring_detector import RecurringDetector
 
-__all__ = ["RuleEngine", "BudgetService", "AlertService"]
+__all__ = ["RuleEngine", "BudgetService", "AlertService", "SpendingTracker", "RollupService", "BudgetEvaluator", "BudgetForecaster", "AlertRetentionService", "CashflowService", "AnomalyDetector", "BalanceSnapshotService", "BillReminderService", "RecurringDetector"]
@@ -0,0 +1,73 @@
+"""
+Alert Hub for Real-Time Alert Push
+In-process pub/sub that fans alerts out to each user's open
+/alerts/stream connections
+"""
+from typing import Dict, Set
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One open stream: a bounded queue bound to the event loop serving it"""
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def _put(self, event: Dict):
+        # Runs on the subscriber's loop; a slow client loses its oldest events
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class AlertHub:
+    """Per-user fan-out of alert events; publish() is safe to call from any thread"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Register a stream for a user; must be called from the serving event loop"""
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a stream once its client disconnects"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: int, event: Dict) -> int:
+        """Push an event to every open stream of a user; returns the number of streams"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    def connection_count(self) -> int:
+        """Number of open streams across all users"""
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+# Shared hub for the API process
+alert_hub = AlertHub()
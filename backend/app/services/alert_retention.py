@@ -0,0 +1,177 @@
+"""
+Alert Retention Service for Bounded Alert Storage
+Archives or deletes old read alerts and compacts repeated read alerts into
+digest rows, in small committed batches that keep locks short and let
+autovacuum keep up
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from app.services.periods import month_key
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows moved per batch; SKIP LOCKED leaves rows a request is touching for the next run
+_BATCH_IDS = """
+    SELECT id FROM alerts
+    WHERE is_read = true
+      AND created_at < :cutoff
+      AND (source_type IS NULL OR period < :cutoff_month)
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+"""
+
+# An id already in the archive (e.g. an alert restored and archived again) is
+# overwritten with the row being deleted, so every deleted alert stays archived
+ARCHIVE_BATCH_SQL = text(f"""
+    WITH moved AS (
+        DELETE FROM alerts
+        WHERE id IN ({_BATCH_IDS})
+        RETURNING id, user_id, title, message, alert_type, created_at,
+                  source_type, source_id, period, threshold, repeat_count
+    )
+    INSERT INTO alerts_archive (id, user_id, title, message, alert_type, created_at,
+                                source_type, source_id, period, threshold, repeat_count, archived_at)
+    SELECT id, user_id, title, message, alert_type, created_at,
+           source_type, source_id, period, threshold, repeat_count, now() AT TIME ZONE 'utc'
+    FROM moved
+    ON CONFLICT (id) DO UPDATE
+    SET user_id = EXCLUDED.user_id, title = EXCLUDED.title, message = EXCLUDED.message,
+        alert_type = EXCLUDED.alert_type, created_at = EXCLUDED.created_at,
+        source_type = EXCLUDED.source_type, source_id = EXCLUDED.source_id, period = EXCLUDED.period,
+        threshold = EXCLUDED.threshold, repeat_count = EXCLUDED.repeat_count, archived_at = EXCLUDED.archived_at
+""")
+
+DELETE_BATCH_SQL = text(f"""
+    DELETE FROM alerts
+    WHERE id IN ({_BATCH_IDS})
+""")
+
+# Folds each group of identical read ad-hoc alerts into its newest row
+COMPACT_BATCH_SQL = text("""
+    WITH groups AS (
+        SELECT user_id, alert_type, title,
+               MAX(id) AS keep_id,
+               SUM(repeat_count) AS total
+        FROM alerts
+        WHERE is_read = true
+          AND source_type IS NULL
+          AND created_at < :cutoff
+        GROUP BY user_id, alert_type, title
+        HAVING COUNT(*) > 1
+        ORDER BY user_id
+        LIMIT :batch_size
+    ),
+    kept AS (
+        UPDATE alerts AS a
+        SET repeat_count = g.total
+        FROM groups AS g
+        WHERE a.id = g.keep_id
+        RETURNING a.id
+    ),
+    removed AS (
+        DELETE FROM alerts AS a
+        USING groups AS g
+        WHERE a.user_id = g.user_id
+          AND a.alert_type IS NOT DISTINCT FROM g.alert_type
+          AND a.title IS NOT DISTINCT FROM g.title
+          AND a.is_read = true
+          AND a.source_type IS NULL
+          AND a.created_at < :cutoff
+          AND a.id <> g.keep_id
+        RETURNING a.id
+    )
+    SELECT (SELECT COUNT(*) FROM kept) AS digests, (SELECT COUNT(*) FROM removed) AS removed
+""")
+
+
+class AlertRetentionService:
+    """Keeps the alerts table bounded; only read alerts are ever touched, so unread counters are unaffected"""
+    
+    # Defaults for the retention job
+    RETENTION_DAYS = 90
+    COMPACT_AFTER_DAYS = 7
+    BATCH_SIZE = 1000
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def purge_read_alerts(
+        self,
+        older_than_days: int = RETENTION_DAYS,
+        archive: bool = True,
+        batch_size: int = BATCH_SIZE,
+        max_batches: Optional[int] = None
+    ) -> Dict:
+        """
+        Move (or delete) read alerts older than the cutoff, one committed batch at a time
+        Deduplicated alerts are kept while their period is inside the window, so
+        budget alerts for recent months are not raised again
+        """
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        params = {
+            "cutoff": cutoff,
+            "cutoff_month": month_key(cutoff),
+            "batch_size": batch_size
+        }
+        statement = ARCHIVE_BATCH_SQL if archive else DELETE_BATCH_SQL
+        started = time.perf_counter()
+        
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            moved = self.db.execute(statement, params).rowcount
+            self.db.commit()
+            batches += 1
+            total += moved
+            if moved < batch_size:
+                break
+        
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        action = "archived" if archive else "deleted"
+        logger.info(f"Retention {action} {total} read alerts older than {older_than_days} days in {batches} batches ({elapsed_ms}ms)")
+        return {action: total, "batches": batches, "elapsed_ms": elapsed_ms}
+    
+    def compact_repeated_alerts(
+        self,
+        older_than_days: int = COMPACT_AFTER_DAYS,
+        batch_size: int = BATCH_SIZE,
+        max_batches: Optional[int] = None
+    ) -> Dict:
+        """
+        Collapse read ad-hoc alerts with the same (user, type, title) into one digest row
+        The newest row survives with repeat_count set to the number of alerts it replaces
+        """
+        params = {
+            "cutoff": datetime.utcnow() - timedelta(days=older_than_days),
+            "batch_size": batch_size
+        }
+        started = time.perf_counter()
+        
+        digests = 0
+        removed = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            result = self.db.execute(COMPACT_BATCH_SQL, params).one()
+            self.db.commit()
+            batches += 1
+            digests += result.digests
+            removed += result.removed
+            if result.digests < batch_size:
+                break
+        
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Compacted {removed} repeated alerts into {digests} digests in {batches} batches ({elapsed_ms}ms)")
+        return {"digests": digests, "removed": removed, "batches": batches, "elapsed_ms": elapsed_ms}
+    
+    def run(self, retention_days: int = RETENTION_DAYS, compact_after_days: int = COMPACT_AFTER_DAYS,
+            archive: bool = True, batch_size: int = BATCH_SIZE) -> Dict:
+        """Compact, then purge; compacting first means fewer rows to move"""
+        return {
+            "compaction": self.compact_repeated_alerts(compact_after_days, batch_size),
+            "retention": self.purge_read_alerts(retention_days, archive, batch_size)
+        }
@@ -3,9 +3,14 @@ Alert Service for Overspending Detection and Alert Management
 Handles budget exceeded alerts and notification management
 """
 from sqlalchemy.orm import Session
-from app.models import Alert, Budget
-from typing import List, Optional, Dict
+from sqlalchemy import func, select, update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from app.models import Alert, AlertCounter, Budget
+from app.services.alert_hub import alert_hub
+from app.services.commit_hooks import after_commit
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
+import base64
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +25,17 @@ class AlertService:
     ALERT_TYPE_WARNING = "warning"
     ALERT_TYPE_ERROR = "error"
     
+    # Alert sources (structured identity used for deduplication)
+    SOURCE_BUDGET = "budget"
+    BUDGET_EXCEEDED_THRESHOLD = 100
+    
+    # Inbox page sizes
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    
+    # Rows flipped per statement by mark_all_as_read
+    MARK_READ_CHUNK_SIZE = 500
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -37,39 +53,25 @@ class AlertService:
             return None
         
         # Check if over budget
-        if budget.spent_amount <= budget.limit_amount:
-            return None
-        
-        # Check if alert already exists for this budget
-        existing_alert = self.db.query(Alert).filter(
-            Alert.user_id == user_id,
-            Alert.alert_type == self.ALERT_TYPE_BUDGET_EXCEEDED,
-            Alert.title.like(f"%{budget.category}%"),
-            Alert.created_at >= self._get_month_start(budget.month)
-        ).first()
-        
-        if existing_alert:
-            logger.info(f"Alert already exists for budget {budget_id}")
+        if (budget.spent_amount or 0) <= (budget.limit_amount or 0):
             return None
         
-        # Create new alert
-        alert = self.create_budget_exceeded_alert(
+        # Deduplicated on (budget, month, threshold) by the alerts unique index
+        return self.create_budget_exceeded_alert(
             user_id=user_id,
             category=budget.category,
             spent_amount=budget.spent_amount,
             limit_amount=budget.limit_amount,
-            month=budget.month
+            month=budget.month,
+            budget_id=budget.id
         )
-        
-        return alert
     
-    def _get_month_start(self, month_str: str) -> datetime:
-        """Get the start of the month for the given month string"""
-        try:
-            year, month = month_str.split('-')
-            return datetime(int(year), int(month), 1)
-        except (ValueError, IndexError):
-            return datetime(datetime.now().year, datetime.now().month, 1)
+    @staticmethod
+    def budget_exceeded_message(category: str, month: str, spent_amount: float, limit_amount: float) -> str:
+        """Message text for a budget exceeded alert"""
+        spent_amount, limit_amount = float(spent_amount), float(limit_amount)
+        over_amount = spent_amount - limit_amount
+        return f"You've exceeded your {category} budget for {month}. Spent: ₹{spent_amount:.2f}, Limit: ₹{limit_amount:.2f}, Over by: ₹{over_amount:.2f}"
     
     def create_budget_exceeded_alert(
         self,
@@ -77,28 +79,31 @@ class AlertService:
         category: str,
         spent_amount: float,
         limit_amount: float,
-        month: str
-    ) -> Alert:
-        """Create a budget exceeded alert"""
-        over_amount = spent_amount - limit_amount
-        
-        alert = Alert(
+        month: str,
+        budget_id: Optional[int] = None
+    ) -> Optional[Alert]:
+        """
+        Create a budget exceeded alert
+        With a budget_id the alert is created at most once per (budget, month);
+        returns None if it already existed
+        """
+        alert = self.create_alert(
             user_id=user_id,
             title=f"Budget Exceeded: {category}",
-            message=f"You've exceeded your {category} budget for {month}. Spent: ₹{spent_amount:.2f}, Limit: ₹{limit_amount:.2f}, Over by: ₹{over_amount:.2f}",
+            message=self.budget_exceeded_message(category, month, spent_amount, limit_amount),
             alert_type=self.ALERT_TYPE_BUDGET_EXCEEDED,
-            is_read=False
+            source_type=self.SOURCE_BUDGET if budget_id is not None else None,
+            source_id=budget_id,
+            period=month if budget_id is not None else None,
+            threshold=self.BUDGET_EXCEEDED_THRESHOLD if budget_id is not None else None
         )
         
-        self.db.add(alert)
-        self.db.commit()
-        self.db.refresh(alert)
-        
-        logger.info(f"Created budget exceeded alert for user {user_id}, category {category}")
+        if alert:
+            logger.info(f"Created budget exceeded alert for user {user_id}, category {category}")
         return alert
     
     def check_all_budgets(self, user_id: int) -> List[Alert]:
-        """Check all user budgets for overspending and create alerts"""
+        """Check all user budgets for overspending and create alerts (does not commit)"""
         budgets = self.db.query(Budget).filter(Budget.user_id == user_id).all()
         
         alerts_created = []
@@ -109,24 +114,100 @@ class AlertService:
         
         return alerts_created
     
-    def get_user_alerts(self, user_id: int, unread_only: bool = False) -> List[Alert]:
-        """Get all alerts for a user"""
+    def get_user_alerts(
+        self,
+        user_id: int,
+        unread_only: bool = False,
+        alert_type: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> List[Alert]:
+        """Get one page of a user's alerts, newest first"""
+        return self.get_alerts_page(user_id, unread_only, alert_type, limit, cursor)[0]
+    
+    def get_alerts_page(
+        self,
+        user_id: int,
+        unread_only: bool = False,
+        alert_type: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Alert], Optional[str]]:
+        """
+        Keyset-paginated alert inbox ordered by (created_at, id) descending
+        Each page is a range scan on ix_alerts_user_created (or the partial
+        ix_alerts_user_unread for unread_only), so its cost does not grow with history.
+        Returns (alerts, next_cursor); next_cursor is None on the last page.
+        Raises ValueError for a malformed cursor
+        """
+        limit = max(1, min(limit, self.MAX_PAGE_SIZE))
         query = self.db.query(Alert).filter(Alert.user_id == user_id)
         
         if unread_only:
             query = query.filter(Alert.is_read == False)
+        if alert_type:
+            query = query.filter(Alert.alert_type == alert_type)
+        if cursor:
+            created_at, alert_id = self.decode_cursor(cursor)
+            query = query.filter(tuple_(Alert.created_at, Alert.id) < tuple_(created_at, alert_id))
         
-        return query.order_by(Alert.created_at.desc()).all()
+        # One extra row tells us whether another page exists
+        alerts = query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit + 1).all()
+        if len(alerts) <= limit:
+            return alerts, None
+        
+        alerts = alerts[:limit]
+        return alerts, self.encode_cursor(alerts[-1])
+    
+    @staticmethod
+    def encode_cursor(alert: Alert) -> str:
+        """Opaque inbox cursor pointing just after an alert"""
+        raw = f"{alert.created_at.isoformat()}|{alert.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Decode an inbox cursor into (created_at, id); raises ValueError if malformed"""
+        try:
+            created_at, alert_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(alert_id)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor")
     
     def get_unread_count(self, user_id: int) -> int:
-        """Get count of unread alerts for a user"""
-        return self.db.query(Alert).filter(
-            Alert.user_id == user_id,
-            Alert.is_read == False
-        ).count()
+        """Get count of unread alerts for a user (primary-key lookup on the counter)"""
+        count = self.db.query(AlertCounter.unread_count).filter(
+            AlertCounter.user_id == user_id
+        ).scalar()
+        return count or 0
+    
+    def adjust_unread_count(self, user_id: int, delta: int):
+        """
+        Atomically add delta to a user's unread counter (clamped at zero)
+        Runs in the caller's transaction so the counter commits with the alert change
+        """
+        if not delta:
+            return
+        stmt = insert(AlertCounter).values(user_id=user_id, unread_count=max(delta, 0))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={"unread_count": func.greatest(AlertCounter.unread_count + delta, 0)}
+        )
+        self.db.execute(stmt)
     
     def mark_as_read(self, alert_id: int, user_id: int) -> Optional[Alert]:
         """Mark an alert as read"""
+        # Only a row that actually flips from unread decrements the counter
+        flipped = self.db.execute(
+            update(Alert).where(
+                Alert.id == alert_id,
+                Alert.user_id == user_id,
+                Alert.is_read == False
+            ).values(is_read=True)
+        ).rowcount
+        self.adjust_unread_count(user_id, -flipped)
+        self.db.commit()
+        
         alert = self.db.query(Alert).filter(
             Alert.id == alert_id,
             Alert.user_id == user_id
@@ -135,47 +216,120 @@ class AlertService:
         if not alert:
             return None
         
-        alert.is_read = True
-        self.db.commit()
-        self.db.refresh(alert)
-        
         logger.info(f"Marked alert {alert_id} as read")
         return alert
     
-    def mark_all_as_read(self, user_id: int) -> int:
-        """Mark all alerts as read for a user"""
-        count = self.db.query(Alert).filter(
-            Alert.user_id == user_id,
-            Alert.is_read == False
-        ).update({"is_read": True})
-        
-        self.db.commit()
+    def mark_all_as_read(self, user_id: int, chunk_size: int = MARK_READ_CHUNK_SIZE) -> int:
+        """
+        Mark all alerts as read for a user
+        Works through the unread partial index in committed chunks, so locks stay
+        short and dead tuples can be vacuumed while a large inbox is processed
+        """
+        count = 0
+        while True:
+            chunk = self.db.query(Alert.id).filter(
+                Alert.user_id == user_id,
+                Alert.is_read == False
+            ).order_by(Alert.created_at, Alert.id).limit(chunk_size).subquery()
+            
+            flipped = self.db.execute(
+                update(Alert).where(
+                    Alert.id.in_(select(chunk.c.id)),
+                    Alert.is_read == False
+                ).values(is_read=True)
+            ).rowcount
+            
+            self.adjust_unread_count(user_id, -flipped)
+            self.db.commit()
+            count += flipped
+            if flipped < chunk_size:
+                break
         
         logger.info(f"Marked {count} alerts as read for user {user_id}")
         return count
     
     def delete_alert(self, alert_id: int, user_id: int) -> bool:
         """Delete an alert"""
-        alert = self.db.query(Alert).filter(
-            Alert.id == alert_id,
-            Alert.user_id == user_id
+        deleted = self.db.execute(
+            delete(Alert).where(
+                Alert.id == alert_id,
+                Alert.user_id == user_id
+            ).returning(Alert.is_read)
         ).first()
         
-        if alert:
-            self.db.delete(alert)
+        if not deleted:
+            return False
+        
+        if not deleted.is_read:
+            self.adjust_unread_count(user_id, -1)
+        self.db.commit()
+        logger.info(f"Deleted alert {alert_id}")
+        return True
+    
+    def reconcile_unread_counts(self, user_id: Optional[int] = None, fix: bool = True) -> List[Dict]:
+        """
+        Compare unread counters with the alerts table and optionally repair them
+        Returns one entry per drifted user with the stored and actual counts
+        """
+        actual_query = self.db.query(
+            Alert.user_id,
+            func.count(Alert.id)
+        ).filter(Alert.is_read == False)
+        stored_query = self.db.query(AlertCounter.user_id, AlertCounter.unread_count)
+        
+        if user_id is not None:
+            actual_query = actual_query.filter(Alert.user_id == user_id)
+            stored_query = stored_query.filter(AlertCounter.user_id == user_id)
+        
+        actual = dict(actual_query.group_by(Alert.user_id).all())
+        stored = dict(stored_query.all())
+        
+        drift = [
+            {"user_id": uid, "stored": stored.get(uid, 0), "actual": actual.get(uid, 0)}
+            for uid in sorted(set(actual) | set(stored))
+            if stored.get(uid, 0) != actual.get(uid, 0)
+        ]
+        
+        if fix and drift:
+            stmt = insert(AlertCounter).values([
+                {"user_id": item["user_id"], "unread_count": item["actual"]} for item in drift
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={"unread_count": stmt.excluded.unread_count}
+            )
+            self.db.execute(stmt)
             self.db.commit()
-            logger.info(f"Deleted alert {alert_id}")
-            return True
-        return False
+            logger.info(f"Repaired unread counters for {len(drift)} users")
+        
+        return drift
     
     def create_alert(
         self,
         user_id: int,
         title: str,
         message: str,
-        alert_type: str = "info"
-    ) -> Alert:
-        """Create a generic alert"""
+        alert_type: str = "info",
+        source_type: Optional[str] = None,
+        source_id: Optional[int] = None,
+        period: Optional[str] = None,
+        threshold: Optional[int] = None
+    ) -> Optional[Alert]:
+        """
+        Create a generic alert
+        Alerts with a source_type are deduplicated on (source_type, source_id, period, threshold);
+        None is returned when such an alert already exists. Flushes only; the caller commits
+        """
+        if source_type is not None:
+            alert_id = self.create_alert_once(
+                user_id, title, message, alert_type,
+                source_type=source_type,
+                source_id=source_id,
+                period=period,
+                threshold=threshold
+            )
+            return self.db.get(Alert, alert_id) if alert_id is not None else None
+        
         alert = Alert(
             user_id=user_id,
             title=title,
@@ -185,12 +339,74 @@ class AlertService:
         )
         
         self.db.add(alert)
-        self.db.commit()
-        self.db.refresh(alert)
+        self.db.flush()
+        self.adjust_unread_count(user_id, 1)
+        self.publish_on_commit(alert.id, user_id, title, message, alert_type, alert.created_at)
         
         logger.info(f"Created alert: {title} for user {user_id}")
         return alert
     
+    def create_alert_once(
+        self,
+        user_id: int,
+        title: str,
+        message: str,
+        alert_type: str,
+        source_type: str,
+        source_id: int,
+        period: str,
+        threshold: int
+    ) -> Optional[int]:
+        """
+        Create an alert unless one already exists for (source_type, source_id, period, threshold)
+        Uses INSERT ... ON CONFLICT DO NOTHING against the partial unique index, so the
+        check costs one index probe and is race-free; does not commit.
+        Returns the new alert id, or None if it was a duplicate
+        """
+        created_at = datetime.utcnow()
+        stmt = insert(Alert).values(
+            user_id=user_id,
+            title=title,
+            message=message,
+            alert_type=alert_type,
+            is_read=False,
+            created_at=created_at,
+            source_type=source_type,
+            source_id=source_id,
+            period=period,
+            threshold=threshold
+        ).on_conflict_do_nothing(
+            index_elements=["source_type", "source_id", "period", "threshold"],
+            index_where=Alert.source_type.isnot(None)
+        ).returning(Alert.id)
+        
+        alert_id = self.db.execute(stmt).scalar()
+        if alert_id is not None:
+            self.adjust_unread_count(user_id, 1)
+            self.publish_on_commit(alert_id, user_id, title, message, alert_type, created_at)
+            logger.info(f"Created alert: {title} for user {user_id}")
+        return alert_id
+    
+    @staticmethod
+    def alert_event(alert_id: int, user_id: int, title: str, message: str, alert_type: str,
+                    is_read: bool, created_at: Optional[datetime]) -> Dict:
+        """Payload pushed to /alerts/stream subscribers for an alert"""
+        return {
+            "id": alert_id,
+            "user_id": user_id,
+            "title": title,
+            "message": message,
+            "alert_type": alert_type,
+            "is_read": is_read,
+            "created_at": created_at.isoformat() if created_at else None
+        }
+    
+    def publish_on_commit(self, alert_id: int, user_id: int, title: str, message: str,
+                           alert_type: str, created_at: Optional[datetime]):
+        """Push a new alert to the user's open streams once it is committed"""
+        event = self.alert_event(alert_id, user_id, title, message, alert_type, False, created_at)
+        after_commit(self.db, lambda: alert_hub.publish(user_id, event))
+    
     def get_alert_with_details(self, alert_id: int, user_id: int) -> Optional[Dict]:
         """Get alert with formatted details"""
         alert = self.db.query(Alert).filter(
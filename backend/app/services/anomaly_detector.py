@@ -0,0 +1,214 @@
+"""
+Anomaly Detector for Unusual Spending
+Scores recent debits against each user's per-category history with robust
+statistics (median / MAD), vectorized with NumPy across all users of a chunk,
+and raises deduplicated alerts for outliers
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.models import Transaction, Account
+from app.services.alert_service import AlertService
+from app.services.rollup_service import RollupService, UNCATEGORIZED_KEY
+from app.services.periods import month_key
+from app.services.job_history import last_successful_result
+from app.services.group_stats import group_medians
+from typing import Dict, Optional
+from datetime import datetime, timedelta, timezone
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Scales MAD to a standard-deviation equivalent for normal data
+MAD_SCALE = 0.6745
+
+
+class AnomalyDetector:
+    """Nightly job that flags debits far outside a user's normal spend for their category"""
+
+    SOURCE_TYPE = "transaction_anomaly"
+    JOB_NAME = "anomaly_scan"
+
+    # Detection defaults
+    LOOKBACK_DAYS = 180
+    RECENT_DAYS = 1  # window of the very first run
+    MAX_WINDOW_DAYS = 7  # catch-up limit after a long outage
+    WINDOW_OVERLAP = timedelta(minutes=10)  # re-scan for late commits; alerts are deduplicated
+    Z_THRESHOLD = 3.5
+    MIN_RATIO = 3.0  # also require at least 3x the typical amount
+    MIN_HISTORY = 5
+    CHUNK_USERS = 1000
+    TIME_BUDGET_SECONDS = 900
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.alert_service = AlertService(db)
+
+    def resume_state(self, now: datetime) -> Dict:
+        """
+        Window and user cursor for the next run, from the last successful run in job_runs:
+        an unfinished window is resumed at its next_user_id, otherwise a new window starts
+        where the last one ended (slightly overlapped), so no debit falls between runs
+        """
+        last = last_successful_result(self.db, self.JOB_NAME) or {}
+        try:
+            window_start = datetime.fromisoformat(last["window_start"])
+            window_end = datetime.fromisoformat(last["window_end"])
+        except (KeyError, TypeError, ValueError):
+            return {"window_start": now - timedelta(days=self.RECENT_DAYS), "window_end": now, "start_user_id": None}
+
+        if last.get("next_user_id") is not None:
+            return {"window_start": window_start, "window_end": window_end, "start_user_id": int(last["next_user_id"])}
+        return {
+            "window_start": max(window_end - self.WINDOW_OVERLAP, now - timedelta(days=self.MAX_WINDOW_DAYS)),
+            "window_end": now,
+            "start_user_id": None
+        }
+
+    def run(
+        self,
+        now: Optional[datetime] = None,
+        chunk_users: int = CHUNK_USERS,
+        time_budget_seconds: float = TIME_BUDGET_SECONDS,
+        start_user_id: Optional[int] = None
+    ) -> Dict:
+        """
+        Score debits created in the window continued from the last run (see resume_state),
+        scanning users in id-range chunks until done or the time budget runs out.
+        Returns counts plus the window and next_user_id (None when every user was
+        scanned); both are recorded in job_runs, so the next run resumes from them.
+        start_user_id overrides the recorded user cursor
+        """
+        now = now or datetime.now(timezone.utc)
+        started = time.perf_counter()
+
+        state = self.resume_state(now)
+        window_start, window_end = state["window_start"], state["window_end"]
+        if start_user_id is None:
+            start_user_id = state["start_user_id"]
+
+        low, high = self.db.query(func.min(Account.user_id), func.max(Account.user_id)).one()
+        if start_user_id is not None and low is not None:
+            low = max(low, start_user_id)
+
+        scanned = 0
+        anomalies = 0
+        alerts_created = 0
+        chunks = 0
+        next_user_id = None
+        if low is not None:
+            for chunk_start in range(low, high + 1, chunk_users):
+                if time.perf_counter() - started > time_budget_seconds:
+                    next_user_id = chunk_start
+                    break
+                result = self.scan_users(chunk_start, min(chunk_start + chunk_users - 1, high), window_start, window_end)
+                self.db.commit()
+                scanned += result["scanned"]
+                anomalies += result["anomalies"]
+                alerts_created += result["alerts_created"]
+                chunks += 1
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Anomaly scan: {scanned} debits since {window_start:%Y-%m-%d %H:%M}, {anomalies} anomalies, "
+                    f"{alerts_created} new alerts in {elapsed_ms}ms ({chunks} chunks)"
+                    + (f", stopped at user {next_user_id}" if next_user_id else ""))
+        return {
+            "window_start": window_start.isoformat(),
+            "window_end": window_end.isoformat(),
+            "scanned": scanned,
+            "anomalies": anomalies,
+            "alerts_created": alerts_created,
+            "chunks": chunks,
+            "next_user_id": next_user_id,
+            "elapsed_ms": elapsed_ms
+        }
+
+    def scan_users(self, min_user_id: int, max_user_id: int, window_start: datetime, window_end: datetime) -> Dict:
+        """
+        Load one chunk of debit history in bulk, score the debits in [window_start, window_end)
+        against the history before them and raise alerts; does not commit
+        """
+        rows = self.db.query(
+            Transaction.id,
+            Transaction.user_id,
+            func.coalesce(Transaction.category, UNCATEGORIZED_KEY),
+            -Transaction.amount,
+            func.extract('epoch', Transaction.created_at),
+            Transaction.description
+        ).filter(
+            Transaction.user_id.between(min_user_id, max_user_id),
+            Transaction.amount < 0,
+            Transaction.created_at >= window_start - timedelta(days=self.LOOKBACK_DAYS),
+            Transaction.created_at < window_end
+        ).all()
+
+        if not rows:
+            return {"scanned": 0, "anomalies": 0, "alerts_created": 0}
+
+        txn_ids, user_ids, categories, amounts, epochs, descriptions = (np.array(col, dtype=object) for col in zip(*rows))
+        user_ids = user_ids.astype(np.int64)
+        amounts = amounts.astype(np.float64)
+        is_recent = epochs.astype(np.float64) >= window_start.timestamp()
+
+        # One group per (user, category)
+        _, category_codes = np.unique(categories.astype(str), return_inverse=True)
+        _, groups = np.unique(user_ids * (category_codes.max() + 1) + category_codes, return_inverse=True)
+
+        scores, medians = robust_scores(groups, amounts, ~is_recent, self.MIN_HISTORY)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = np.where(medians > 0, amounts / medians, np.inf)
+        flagged = np.flatnonzero(is_recent & (scores >= self.Z_THRESHOLD) & (ratios >= self.MIN_RATIO))
+
+        created = 0
+        for i in flagged:
+            category = RollupService.category_label(categories[i])
+            alert_id = self.alert_service.create_alert_once(
+                user_id=int(user_ids[i]),
+                title=f"Unusual spending: {category}",
+                message=f"₹{amounts[i]:.2f} on '{descriptions[i]}' is {ratios[i]:.1f}x your typical "
+                        f"{category} spend of ₹{medians[i]:.2f}",
+                alert_type=AlertService.ALERT_TYPE_WARNING,
+                source_type=self.SOURCE_TYPE,
+                source_id=int(txn_ids[i]),
+                period=month_key(datetime.fromtimestamp(float(epochs[i]), timezone.utc)),
+                threshold=0
+            )
+            if alert_id is not None:
+                created += 1
+
+        return {"scanned": int(is_recent.sum()), "anomalies": len(flagged), "alerts_created": created}
+
+
+def robust_scores(groups: np.ndarray, amounts: np.ndarray, is_history: np.ndarray, min_history: int):
+    """
+    Robust z-score of every amount against the median / MAD of the history rows
+    of its group, computed for all groups at once with sorts and segment indexing.
+    Groups with fewer than min_history history rows score 0.
+    Returns (scores, group median per row)
+    """
+    n_groups = int(groups.max()) + 1 if len(groups) else 0
+    hist_groups = groups[is_history]
+    hist_amounts = amounts[is_history]
+
+    group_median = group_medians(hist_groups, hist_amounts, n_groups)
+    deviations = np.abs(hist_amounts - group_median[hist_groups])
+    group_mad = group_medians(hist_groups, deviations, n_groups)
+
+    # Identical history amounts give MAD 0; fall back to the mean absolute deviation
+    counts = np.bincount(hist_groups, minlength=n_groups)
+    mean_dev = np.bincount(hist_groups, weights=deviations, minlength=n_groups) / np.maximum(counts, 1)
+    spread = np.where(group_mad > 0, group_mad / MAD_SCALE, mean_dev * 1.2533)
+
+    medians = group_median[groups]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(
+            (counts[groups] >= min_history) & (spread[groups] > 0),
+            (amounts - medians) / spread[groups],
+            0.0
+        )
+    # Perfectly uniform history: anything above it is anomalous
+    uniform = (counts[groups] >= min_history) & (spread[groups] == 0) & (amounts > medians)
+    scores[uniform] = np.inf
+    return scores, medians
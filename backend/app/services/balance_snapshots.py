@@ -0,0 +1,150 @@
+"""
+Balance Snapshot Service for Daily Account Balances and Net Worth
+Writes one end-of-day balance per account and one net worth row per user, so
+balance history charts read O(days) snapshot rows instead of replaying transactions
+
+The balance at the end of a local day is the sum of every transaction of the
+account created before that day ended; accounts.balance is not read, so the job
+and the backfill write the same rows however the stored balance was maintained.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from app.models import User, AccountBalanceSnapshot, NetWorthSnapshot
+from app.services.periods import DEFAULT_TIMEZONE
+from typing import List, Dict, Optional
+from datetime import date, datetime, timezone
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Folds the balances written by the statement into per-user net worth rows
+NET_WORTH_UPSERT_SQL = """
+    INSERT INTO net_worth_snapshots (user_id, day, net_worth, account_count)
+    SELECT user_id, day, SUM(balance), COUNT(*)
+    FROM balances
+    GROUP BY user_id, day
+    ON CONFLICT (user_id, day) DO UPDATE
+    SET net_worth = EXCLUDED.net_worth, account_count = EXCLUDED.account_count
+"""
+
+# End-of-day balances for a range of users, from each account's start day through its
+# local today: the closing balance of the day before the window (one index range per
+# account) plus a running sum (window function) of the grouped daily amounts. The
+# window starts at :start, or :days_back days before each user's local today
+BALANCES_SQL = text("""
+    WITH accts AS (
+        SELECT a.id AS account_id, a.user_id, l.tz, l.today,
+               COALESCE(CAST(:start AS date), l.today - CAST(:days_back AS integer)) AS start_day
+        FROM accounts AS a
+        JOIN users AS u ON u.id = a.user_id
+        CROSS JOIN LATERAL (
+            SELECT COALESCE(u.timezone, :default_tz) AS tz,
+                   CAST(timezone(COALESCE(u.timezone, :default_tz), CAST(:now AS timestamptz)) AS date) AS today
+        ) AS l
+        WHERE a.user_id BETWEEN :min_user_id AND :max_user_id
+    ),
+    opening AS (
+        SELECT t.account_id, SUM(t.amount) AS amount
+        FROM transactions AS t
+        JOIN accts AS ac ON ac.account_id = t.account_id
+        WHERE t.created_at < CAST(ac.start_day AS timestamp) AT TIME ZONE ac.tz
+        GROUP BY t.account_id
+    ),
+    daily AS (
+        SELECT t.account_id, CAST(timezone(ac.tz, t.created_at) AS date) AS day, SUM(t.amount) AS amount
+        FROM transactions AS t
+        JOIN accts AS ac ON ac.account_id = t.account_id
+        WHERE t.created_at >= CAST(ac.start_day AS timestamp) AT TIME ZONE ac.tz
+          AND t.created_at < CAST(ac.today + 1 AS timestamp) AT TIME ZONE ac.tz
+        GROUP BY t.account_id, CAST(timezone(ac.tz, t.created_at) AS date)
+    ),
+    series AS (
+        SELECT ac.account_id, ac.user_id, CAST(g.day AS date) AS day,
+               COALESCE(o.amount, 0) AS opening, COALESCE(dl.amount, 0) AS amount
+        FROM accts AS ac
+        CROSS JOIN LATERAL generate_series(ac.start_day, ac.today, interval '1 day') AS g(day)
+        LEFT JOIN opening AS o ON o.account_id = ac.account_id
+        LEFT JOIN daily AS dl ON dl.account_id = ac.account_id AND dl.day = CAST(g.day AS date)
+    ),
+    balances AS (
+        INSERT INTO account_balance_snapshots (account_id, user_id, day, balance)
+        SELECT account_id, user_id, day, CAST(opening + SUM(amount) OVER (
+            PARTITION BY account_id ORDER BY day
+            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+        ) AS NUMERIC(14, 2))
+        FROM series
+        ON CONFLICT (account_id, day) DO UPDATE
+        SET balance = EXCLUDED.balance, user_id = EXCLUDED.user_id
+        RETURNING user_id, day, balance
+    )
+""" + NET_WORTH_UPSERT_SQL)
+
+
+class BalanceSnapshotService:
+    """Writes and reads daily account balance and net worth snapshots"""
+
+    # Users per INSERT ... SELECT; the job commits after each chunk
+    CHUNK_SIZE = 5000
+    # Default window of the series endpoints
+    DEFAULT_DAYS = 90
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def snapshot(self, now: Optional[datetime] = None, days_back: int = 1, chunk_size: Optional[int] = None) -> Dict:
+        """
+        Upsert end-of-day balances for today and the previous days_back local days of
+        every user. Re-running is idempotent; today's row stays provisional until the
+        next run after midnight rewrites it as yesterday
+        """
+        return self._run({"start": None, "days_back": days_back}, now, chunk_size, "Balance snapshot")
+
+    def backfill(self, start: date, now: Optional[datetime] = None, chunk_size: Optional[int] = None) -> Dict:
+        """Rebuild every day from start through today from transaction history"""
+        return self._run({"start": start.isoformat(), "days_back": None}, now, chunk_size, "Balance backfill")
+
+    def _run(self, params: Dict, now: Optional[datetime], chunk_size: Optional[int], label: str) -> Dict:
+        started = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        params = {**params, "now": now, "default_tz": DEFAULT_TIMEZONE}
+
+        min_user_id, max_user_id = self.db.query(func.min(User.id), func.max(User.id)).one()
+
+        net_worth_rows = 0
+        chunks = 0
+        if min_user_id is not None:
+            step = chunk_size or self.CHUNK_SIZE
+            for chunk_start in range(min_user_id, max_user_id + 1, step):
+                result = self.db.execute(BALANCES_SQL, {
+                    **params,
+                    "min_user_id": chunk_start,
+                    "max_user_id": min(chunk_start + step - 1, max_user_id)
+                })
+                self.db.commit()
+                net_worth_rows += result.rowcount
+                chunks += 1
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"{label}: {net_worth_rows} net worth rows in {elapsed_ms}ms ({chunks} chunks)")
+        return {"net_worth_rows": net_worth_rows, "chunks": chunks, "elapsed_ms": elapsed_ms}
+
+    def get_account_series(self, user_id: int, account_id: int, start: date, end: date) -> List[Dict]:
+        """End-of-day balances of one account, oldest first (a primary-key range read)"""
+        rows = self.db.query(AccountBalanceSnapshot.day, AccountBalanceSnapshot.balance).filter(
+            AccountBalanceSnapshot.account_id == account_id,
+            AccountBalanceSnapshot.user_id == user_id,
+            AccountBalanceSnapshot.day.between(start, end)
+        ).order_by(AccountBalanceSnapshot.day).all()
+        return [{"day": r.day, "balance": float(r.balance)} for r in rows]
+
+    def get_net_worth_series(self, user_id: int, start: date, end: date) -> List[Dict]:
+        """End-of-day net worth of a user, oldest first"""
+        rows = self.db.query(NetWorthSnapshot).filter(
+            NetWorthSnapshot.user_id == user_id,
+            NetWorthSnapshot.day.between(start, end)
+        ).order_by(NetWorthSnapshot.day).all()
+        return [
+            {"day": r.day, "net_worth": float(r.net_worth), "account_count": r.account_count}
+            for r in rows
+        ]
@@ -0,0 +1,95 @@
+"""
+Bill Reminder Engine for Upcoming Unpaid Bills
+Raises one reminder alert per bill and due date for every unpaid bill due within
+the reminder window, across all users in a single statement
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from app.services.alert_service import AlertService
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Money formatting matching f"{value:.2f}"
+_MONEY = "'FM999999999990.00'"
+
+# One range scan of ix_bills_unpaid_due; the due date is the reminder's period, so the
+# partial unique index on alerts skips bills already reminded for this cycle and a bill
+# moved to a new due date is reminded again. Unread counters are bumped in the same statement
+REMINDER_SQL = text(f"""
+    WITH due AS (
+        SELECT b.id, b.user_id, b.bill_name, b.amount, b.due_date
+        FROM bills AS b
+        WHERE b.is_paid = false
+          AND b.due_date >= :window_start
+          AND b.due_date < :window_end
+          AND b.user_id IS NOT NULL
+    ),
+    inserted AS (
+        INSERT INTO alerts (user_id, title, message, alert_type, is_read, created_at,
+                            source_type, source_id, period, threshold, repeat_count)
+        SELECT user_id,
+               'Bill Due: ' || COALESCE(bill_name, 'Bill'),
+               'Your ' || COALESCE(bill_name, 'bill') || ' of ₹' || to_char(CAST(COALESCE(amount, 0) AS NUMERIC), {_MONEY})
+                   || ' is due on ' || to_char(due_date, 'YYYY-MM-DD') || '.',
+               :alert_type, false, now() AT TIME ZONE 'utc',
+               :source_type, id, to_char(due_date, 'YYYY-MM-DD'), 0, 1
+        FROM due
+        ORDER BY due_date, id
+        ON CONFLICT (source_type, source_id, period, threshold) WHERE source_type IS NOT NULL DO NOTHING
+        RETURNING id, user_id, title, message, alert_type, created_at
+    ),
+    counted AS (
+        INSERT INTO alert_counters (user_id, unread_count)
+        SELECT user_id, COUNT(*) FROM inserted GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET unread_count = alert_counters.unread_count + EXCLUDED.unread_count
+    )
+    SELECT id, user_id, title, message, alert_type, created_at FROM inserted
+""")
+
+
+class BillReminderService:
+    """Creates deduplicated reminder alerts for unpaid bills that are due soon"""
+
+    SOURCE_TYPE = "bill_due"
+    # Remind this many days ahead of the due date
+    REMINDER_DAYS = 3
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.alert_service = AlertService(db)
+
+    def run(self, days_ahead: Optional[int] = None, now: Optional[datetime] = None) -> Dict:
+        """
+        Remind every unpaid bill due from the start of today through days_ahead days
+        from now (bills.due_date is naive UTC); commits and returns counts
+        """
+        started = time.perf_counter()
+        days_ahead = self.REMINDER_DAYS if days_ahead is None else days_ahead
+        now = now or datetime.utcnow()
+        window_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        window_end = window_start + timedelta(days=days_ahead + 1)
+
+        rows = self.db.execute(REMINDER_SQL, {
+            "window_start": window_start,
+            "window_end": window_end,
+            "alert_type": AlertService.ALERT_TYPE_INFO,
+            "source_type": self.SOURCE_TYPE
+        }).all()
+        for row in rows:
+            self.alert_service.publish_on_commit(
+                row.id, row.user_id, row.title, row.message, row.alert_type, row.created_at
+            )
+        self.db.commit()
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Bill reminders: {len(rows)} new alerts for bills due before {window_end:%Y-%m-%d} in {elapsed_ms}ms")
+        return {
+            "window_start": window_start,
+            "window_end": window_end,
+            "alerts_created": len(rows),
+            "elapsed_ms": elapsed_ms
+        }
@@ -0,0 +1,220 @@
+"""
+Budget Evaluator for Event-Driven Threshold Alerts
+Runs whenever spending for a (user, category, month) changes and raises
+at most one alert per (budget, month, threshold)
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from app.models import Budget
+from app.services.alert_service import AlertService
+from app.services.periods import current_month, shift_month
+from typing import List, Dict, Optional
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Money formatting matching f"{value:.2f}" in _format_alert
+_MONEY = "'FM999999999990.00'"
+
+# Set-based breach scan: every crossed (budget, threshold) in a user-id range becomes
+# an alert in one INSERT ... SELECT; existing alerts are skipped by the partial unique
+# index and unread counters are bumped in the same statement
+BREACH_SCAN_SQL = f"""
+    WITH thresholds (threshold, alert_type) AS (
+        VALUES {{thresholds}}
+    ),
+    breaches AS (
+        SELECT b.id, b.user_id, b.category, b.month,
+               b.spent_amount AS spent, b.limit_amount AS limit_amount,
+               t.threshold, t.alert_type
+        FROM budgets AS b
+        CROSS JOIN thresholds AS t
+        WHERE b.month = ANY(:months)
+          AND b.user_id BETWEEN :min_user_id AND :max_user_id
+          AND b.limit_amount > 0
+          AND CASE WHEN t.threshold >= 100
+                   THEN b.spent_amount > b.limit_amount * t.threshold / 100.0
+                   ELSE b.spent_amount >= b.limit_amount * t.threshold / 100.0
+              END
+    ),
+    inserted AS (
+        INSERT INTO alerts (user_id, title, message, alert_type, is_read, created_at,
+                            source_type, source_id, period, threshold, repeat_count)
+        SELECT user_id,
+               CASE WHEN threshold >= 100 THEN 'Budget Exceeded: ' ELSE 'Budget Warning: ' END || category,
+               CASE WHEN threshold >= 100
+                    THEN 'You''ve exceeded your ' || category || ' budget for ' || month
+                         || '. Spent: ₹' || to_char(spent, {_MONEY})
+                         || ', Limit: ₹' || to_char(limit_amount, {_MONEY})
+                         || ', Over by: ₹' || to_char(spent - limit_amount, {_MONEY})
+                    ELSE 'You''ve used ' || threshold || '% of your ' || category || ' budget for ' || month
+                         || '. Spent: ₹' || to_char(spent, {_MONEY})
+                         || ', Limit: ₹' || to_char(limit_amount, {_MONEY})
+               END,
+               alert_type, false, now() AT TIME ZONE 'utc',
+               :source_type, id, month, threshold, 1
+        FROM breaches
+        ORDER BY id, threshold
+        ON CONFLICT (source_type, source_id, period, threshold) WHERE source_type IS NOT NULL DO NOTHING
+        RETURNING id, user_id, title, message, alert_type, created_at
+    ),
+    counted AS (
+        INSERT INTO alert_counters (user_id, unread_count)
+        SELECT user_id, COUNT(*) FROM inserted GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET unread_count = alert_counters.unread_count + EXCLUDED.unread_count
+    )
+    SELECT id, user_id, title, message, alert_type, created_at FROM inserted
+"""
+
+
+class BudgetEvaluator:
+    """Compares budget spending against its limit and emits deduplicated alerts"""
+    
+    SOURCE_TYPE = AlertService.SOURCE_BUDGET
+    
+    # (percentage of limit, alert type); 100 means strictly over the limit
+    THRESHOLDS = (
+        (80, AlertService.ALERT_TYPE_WARNING),
+        (AlertService.BUDGET_EXCEEDED_THRESHOLD, AlertService.ALERT_TYPE_BUDGET_EXCEEDED),
+    )
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.alert_service = AlertService(db)
+    
+    def evaluate(self, user_id: int, category: str, month: str) -> List[int]:
+        """Evaluate the budget for a (user, category, month), if one exists"""
+        budget = self.db.query(Budget).filter(
+            Budget.user_id == user_id,
+            Budget.category == category,
+            Budget.month == month
+        ).first()
+        
+        if not budget:
+            return []
+        
+        return self.evaluate_budget(budget)
+    
+    def evaluate_budget(self, budget: Budget) -> List[int]:
+        """Evaluate a loaded budget; returns ids of newly created alerts"""
+        return self.evaluate_values(
+            budget_id=budget.id,
+            user_id=budget.user_id,
+            category=budget.category,
+            month=budget.month,
+            spent_amount=budget.spent_amount,
+            limit_amount=budget.limit_amount
+        )
+    
+    def evaluate_values(
+        self,
+        budget_id: int,
+        user_id: int,
+        category: str,
+        month: str,
+        spent_amount,
+        limit_amount
+    ) -> List[int]:
+        """
+        Evaluate budget figures (e.g. from UPDATE ... RETURNING) against every threshold
+        Does not commit; duplicates are dropped by the alerts unique constraint
+        """
+        spent = float(spent_amount or 0)
+        limit_amount = float(limit_amount or 0)
+        
+        if limit_amount <= 0:
+            return []
+        
+        created = []
+        for threshold, alert_type in self.THRESHOLDS:
+            if not self._crossed(spent, limit_amount, threshold):
+                continue
+            
+            title, message = self._format_alert(category, month, spent, limit_amount, threshold)
+            alert_id = self.alert_service.create_alert_once(
+                user_id=user_id,
+                title=title,
+                message=message,
+                alert_type=alert_type,
+                source_type=self.SOURCE_TYPE,
+                source_id=budget_id,
+                period=month,
+                threshold=threshold
+            )
+            if alert_id is not None:
+                created.append(alert_id)
+        
+        if created:
+            logger.info(f"Budget {budget_id} crossed thresholds, created alerts {created}")
+        return created
+    
+    def scan_all(
+        self,
+        months: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Raise every missing threshold alert for every user's budgets in the given months
+        (defaults to the current and previous month, which covers every user timezone).
+        One INSERT ... SELECT per chunk of user ids (or a single one), committed per chunk
+        """
+        if not months:
+            month = current_month()
+            months = [shift_month(month, -1), month]
+        started = time.perf_counter()
+        
+        params = {"months": months, "source_type": self.SOURCE_TYPE}
+        values = []
+        for i, (threshold, alert_type) in enumerate(self.THRESHOLDS):
+            values.append(f"(CAST(:threshold_{i} AS INTEGER), CAST(:alert_type_{i} AS VARCHAR))")
+            params[f"threshold_{i}"] = threshold
+            params[f"alert_type_{i}"] = alert_type
+        statement = text(BREACH_SCAN_SQL.format(thresholds=", ".join(values)))
+        
+        min_user_id, max_user_id = self.db.query(
+            func.min(Budget.user_id), func.max(Budget.user_id)
+        ).filter(Budget.month.in_(months)).one()
+        
+        alerts_created = 0
+        chunks = 0
+        if min_user_id is not None:
+            step = chunk_size or (max_user_id - min_user_id + 1)
+            for chunk_start in range(min_user_id, max_user_id + 1, step):
+                rows = self.db.execute(statement, {
+                    **params,
+                    "min_user_id": chunk_start,
+                    "max_user_id": min(chunk_start + step - 1, max_user_id)
+                }).all()
+                for row in rows:
+                    self.alert_service.publish_on_commit(
+                        row.id, row.user_id, row.title, row.message, row.alert_type, row.created_at
+                    )
+                self.db.commit()
+                alerts_created += len(rows)
+                chunks += 1
+        
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Budget breach scan over {months}: {alerts_created} alerts created in {elapsed_ms}ms ({chunks} chunks)")
+        return {
+            "months": months,
+            "alerts_created": alerts_created,
+            "chunks": chunks,
+            "elapsed_ms": elapsed_ms
+        }
+    
+    def _crossed(self, spent: float, limit_amount: float, threshold: int) -> bool:
+        if threshold >= 100:
+            return spent > limit_amount * threshold / 100
+        return spent >= limit_amount * threshold / 100
+    
+    def _format_alert(self, category: str, month: str, spent: float, limit_amount: float, threshold: int):
+        if threshold >= 100:
+            return (
+                f"Budget Exceeded: {category}",
+                AlertService.budget_exceeded_message(category, month, spent, limit_amount)
+            )
+        return (
+            f"Budget Warning: {category}",
+            f"You've used {threshold}% of your {category} budget for {month}. Spent: ₹{spent:.2f}, Limit: ₹{limit_amount:.2f}"
+        )
@@ -0,0 +1,136 @@
+"""
+Budget Forecast Service for Month-End Spending Projections
+Projects burn rate, month-end spend and overshoot date for all of a user's
+budgets at once with a NumPy-vectorized computation over daily spending
+"""
+from sqlalchemy.orm import Session
+from app.models import Budget
+from app.services.budget_service import BudgetService
+from app.services.periods import get_user_timezone, month_bounds, parse_month, current_month
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+import calendar
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetForecaster:
+    """Forecasts month-end spending for every budget of a user in one pass"""
+
+    # z-score for the confidence band around the projection (~95%)
+    CONFIDENCE_Z = 1.96
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.budget_service = BudgetService(db)
+
+    def forecast(self, user_id: int, month: Optional[str] = None, as_of: Optional[datetime] = None) -> List[Dict]:
+        """Forecast all budgets of a user for a month (defaults to the current month)"""
+        tz = get_user_timezone(self.db, user_id)
+        month = month or current_month(tz)
+        year, month_int = parse_month(month)
+
+        budgets = self.db.query(Budget).filter(
+            Budget.user_id == user_id,
+            Budget.month == month
+        ).order_by(Budget.id).all()
+
+        if not budgets:
+            return []
+
+        days_in_month = calendar.monthrange(year, month_int)[1]
+        elapsed_days = self._elapsed_days(month, days_in_month, as_of or datetime.now(tz), tz)
+
+        # categories x days matrix of debit totals, filled from one grouped query
+        index = {budget.category: i for i, budget in enumerate(budgets)}
+        daily = np.zeros((len(budgets), days_in_month))
+        rows = self.budget_service.get_daily_spending(user_id, month, list(index))
+        if rows:
+            categories, days, amounts = zip(*rows)
+            np.add.at(daily, ([index[c] for c in categories], np.array(days) - 1), amounts)
+
+        limits = np.array([float(b.limit_amount or 0) for b in budgets])
+        stats = forecast_matrix(daily, limits, elapsed_days, self.CONFIDENCE_Z)
+
+        month_start = month_bounds(month, tz)[0].date()
+        result = []
+        for i, budget in enumerate(budgets):
+            overshoot_day = int(stats["overshoot_day"][i])
+            result.append({
+                "budget_id": budget.id,
+                "category": budget.category,
+                "month": budget.month,
+                "limit_amount": round(float(limits[i]), 2),
+                "spent_amount": round(float(stats["spent"][i]), 2),
+                "days_elapsed": elapsed_days,
+                "days_in_month": days_in_month,
+                "burn_rate": round(float(stats["burn_rate"][i]), 2),
+                "projected_spend": round(float(stats["projected"][i]), 2),
+                "projected_low": round(float(stats["low"][i]), 2),
+                "projected_high": round(float(stats["high"][i]), 2),
+                "projected_overshoot": round(float(stats["projected"][i] - limits[i]), 2),
+                "will_exceed": bool(stats["projected"][i] > limits[i]),
+                "overshoot_date": (month_start + timedelta(days=overshoot_day - 1)) if overshoot_day > 0 else None
+            })
+
+        logger.info(f"Forecast {len(budgets)} budgets for user {user_id} month {month}")
+        return result
+
+    def _elapsed_days(self, month: str, days_in_month: int, now: datetime, tz) -> int:
+        """Days of the month already observed (0 for future months, all for past ones)"""
+        start, next_start = month_bounds(month, tz)
+        now = now.astimezone(tz)
+        if now < start:
+            return 0
+        if now >= next_start:
+            return days_in_month
+        return now.day
+
+
+def forecast_matrix(daily: np.ndarray, limits: np.ndarray, elapsed_days: int, z: float) -> Dict[str, np.ndarray]:
+    """
+    Vectorized forecast over a (budgets x days) matrix of daily spending
+    Returns per-budget arrays: spent, burn_rate, projected, low, high and
+    overshoot_day (1-based day of month the limit is/will be passed, 0 if never)
+    """
+    n_budgets, days_in_month = daily.shape
+    observed = daily[:, :elapsed_days]
+    remaining_days = days_in_month - elapsed_days
+
+    spent = observed.sum(axis=1)
+    burn_rate = spent / elapsed_days if elapsed_days else np.zeros(n_budgets)
+    std = observed.std(axis=1, ddof=1) if elapsed_days > 1 else np.zeros(n_budgets)
+
+    projected = spent + burn_rate * remaining_days
+    margin = z * std * np.sqrt(remaining_days)
+    low = np.maximum(projected - margin, spent)
+    high = projected + margin
+
+    # Day the limit was already passed, from the cumulative actuals
+    if elapsed_days:
+        passed = np.cumsum(observed, axis=1) > limits[:, None]
+        actual_day = np.where(passed.any(axis=1), passed.argmax(axis=1) + 1, 0)
+    else:
+        actual_day = np.zeros(n_budgets, dtype=int)
+
+    # Otherwise the day the current burn rate would pass it
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_needed = np.floor((limits - spent) / burn_rate) + 1
+        projected_day = np.where(
+            (burn_rate > 0) & (elapsed_days + days_needed <= days_in_month),
+            elapsed_days + days_needed,
+            0
+        )
+    overshoot_day = np.where(actual_day > 0, actual_day, projected_day).astype(int)
+
+    return {
+        "spent": spent,
+        "burn_rate": burn_rate,
+        "projected": projected,
+        "low": low,
+        "high": high,
+        "overshoot_day": overshoot_day
+    }
@@ -3,14 +3,49 @@ Budget Service for Monthly Budget Computation and Tracking
 Handles budget aggregation, progress calculation, and overspending detection
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models import Budget, Transaction, Account, Alert
+from sqlalchemy import func, text, select, literal, literal_column, and_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from app.models import Budget, Transaction, Alert, CategoryMonthlyRollup
+from app.services.rollup_service import RollupService
+from app.services.periods import DEFAULT_TIMEZONE, get_user_timezone, month_bounds, month_range, current_month, parse_month
+from app.services.budget_evaluator import BudgetEvaluator
+from app.services.insights_cache import invalidate_on_commit, invalidate_shared_on_commit
+from app.services.transaction_snapshot import transaction_snapshots
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import logging
+import time
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Set-based refresh of budgets.spent_amount for one month and a range of users.
+# Month bounds are local midnights, converted with each user's timezone.
+# Returns the changed rows so they can be evaluated against the alert thresholds.
+RECOMPUTE_MONTH_SQL = text("""
+    UPDATE budgets AS b
+    SET spent_amount = COALESCE(agg.spent, 0)
+    FROM budgets AS target
+    LEFT JOIN (
+        SELECT t.user_id, t.category, SUM(-t.amount) AS spent
+        FROM transactions AS t
+        JOIN users AS u ON u.id = t.user_id
+        WHERE t.amount < 0
+          AND t.category IS NOT NULL
+          AND t.user_id BETWEEN :min_user_id AND :max_user_id
+          AND t.created_at >= CAST(:month_start AS timestamp) AT TIME ZONE COALESCE(u.timezone, :default_tz)
+          AND t.created_at < CAST(:next_start AS timestamp) AT TIME ZONE COALESCE(u.timezone, :default_tz)
+        GROUP BY t.user_id, t.category
+    ) AS agg ON agg.user_id = target.user_id AND agg.category = target.category
+    WHERE b.id = target.id
+      AND target.month = :month
+      AND target.user_id BETWEEN :min_user_id AND :max_user_id
+      AND b.spent_amount IS DISTINCT FROM COALESCE(agg.spent, 0)
+    RETURNING b.id, b.user_id, b.category, b.month, b.spent_amount, b.limit_amount
+""")
+
 
 class BudgetService:
     """Handles budget computation and tracking"""
@@ -18,66 +53,116 @@ class BudgetService:
     def __init__(self, db: Session):
         self.db = db
     
-    def get_user_accounts(self, user_id: int) -> List[int]:
-        """Get all account IDs for a user"""
-        accounts = self.db.query(Account).filter(Account.user_id == user_id).all()
-        return [account.id for account in accounts]
-    
-    def calculate_spent_amount(self, user_id: int, category: str, month: str, year: int) -> float:
-        """
-        Calculate the total spent amount for a specific category in a month
-        Only considers debit transactions (negative amounts)
-        """
-        account_ids = self.get_user_accounts(user_id)
-        
-        if not account_ids:
-            return 0.0
-        
+    def _budget_month(self, month: str, year: int) -> str:
+        """Normalize the (month, year) arguments into a "YYYY-MM" string"""
         # Parse month string (format: "2024-01")
         try:
             month_int = int(month.split('-')[1])
-        except (ValueError, IndexError):
+        except (ValueError, IndexError, AttributeError):
             month_int = datetime.now().month
-        
-        # Query transactions for the category in the specified month/year
-        # Only consider negative amounts (debits)
-        result = self.db.query(func.sum(Transaction.amount)).filter(
-            Transaction.account_id.in_(account_ids),
+        return f"{year:04d}-{month_int:02d}"
+    
+    def spent_amount_query(self, user_id: int, category: str, month: str):
+        """
+        Debit total for one category in a "YYYY-MM" month
+        Filters on a [start, next_start) range so ix_transactions_user_category_created applies
+        """
+        return self.db.query(func.sum(Transaction.amount)).filter(
+            Transaction.user_id == user_id,
             Transaction.category == category,
-            func.extract('month', Transaction.created_at) == month_int,
-            func.extract('year', Transaction.created_at) == year,
+            month_range(Transaction.created_at, month, get_user_timezone(self.db, user_id)),
             Transaction.amount < 0  # Only debits
-        ).scalar()
+        )
+    
+    def calculate_spent_amount(self, user_id: int, category: str, month: str, year: int) -> float:
+        """
+        Calculate the total spent amount for a specific category in a month
+        Only considers debit transactions (negative amounts)
+        """
+        result = self.spent_amount_query(user_id, category, self._budget_month(month, year)).scalar()
         
         spent = abs(result) if result else 0.0
         return round(spent, 2)
     
+    def calculate_month_spending(self, user_id: int, category: str, month: str) -> float:
+        """Calculate spending for a category in a "YYYY-MM" budget month"""
+        try:
+            year = int(month.split('-')[0])
+        except (ValueError, IndexError, AttributeError):
+            year = datetime.now().year
+        
+        return self.calculate_spent_amount(user_id, category, month, year)
+    
     def calculate_all_category_spending(self, user_id: int, month: str, year: int) -> Dict[str, float]:
         """
         Calculate spending for all categories in a given month
-        Returns dict of category -> amount
+        Reads the per-user monthly category rollup; returns dict of category -> amount
         """
-        account_ids = self.get_user_accounts(user_id)
-        
-        if not account_ids:
-            return {}
+        totals = RollupService(self.db).get_category_totals(user_id, month)
         
-        try:
-            month_int = int(month.split('-')[1])
-        except (ValueError, IndexError):
-            month_int = datetime.now().month
-        
-        # Query all categories with their total spending
-        results = self.db.query(
+        return {
+            t["category"]: round(t["debit_total"], 2)
+            for t in totals
+            if t["category"] and t["debit_total"] > 0
+        }
+    
+    def category_spending_query(self, user_id: int, month: str):
+        """Debit totals per category for a "YYYY-MM" month, using a sargable range"""
+        return self.db.query(
             Transaction.category,
             func.sum(func.abs(Transaction.amount))
         ).filter(
-            Transaction.account_id.in_(account_ids),
-            func.extract('month', Transaction.created_at) == month_int,
-            func.extract('year', Transaction.created_at) == year,
+            Transaction.user_id == user_id,
+            month_range(Transaction.created_at, month, get_user_timezone(self.db, user_id)),
             Transaction.amount < 0,
             Transaction.category.isnot(None)
-        ).group_by(Transaction.category).all()
+        ).group_by(Transaction.category)
+    
+    def get_daily_spending(self, user_id: int, month: str, categories: List[str]) -> List[Tuple[str, int, float]]:
+        """
+        Debit totals per (category, day of month) for the given categories
+        Sliced from the user's in-memory transaction snapshot when available, otherwise
+        one grouped query over a sargable month range; days are in the user's timezone
+        """
+        if not categories:
+            return []
+        
+        tz = get_user_timezone(self.db, user_id)
+        
+        snapshot = transaction_snapshots.get(self.db, user_id)
+        if snapshot is not None:
+            # One bucket per local day, so DST days keep their true length
+            start, next_start = month_bounds(month, tz)
+            days = (next_start.replace(tzinfo=None) - start.replace(tzinfo=None)).days
+            boundaries = np.array([
+                datetime(start.year, start.month, day, tzinfo=tz).timestamp() for day in range(1, days + 1)
+            ] + [next_start.timestamp()])
+            expense = snapshot.bucket_totals(boundaries, categories)["expense"]
+            rows, cols = np.nonzero(expense)
+            return [(categories[r], int(c) + 1, float(expense[r, c])) for r, c in zip(rows, cols)]
+        
+        day_expr = func.date_part('day', func.timezone(tz.key, Transaction.created_at))
+        
+        results = self.db.query(
+            Transaction.category,
+            day_expr.label('day'),
+            func.sum(-Transaction.amount).label('amount')
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.category.in_(categories),
+            month_range(Transaction.created_at, month, tz),
+            Transaction.amount < 0
+        ).group_by(Transaction.category, day_expr).all()
+        
+        return [(r.category, int(r.day), float(r.amount)) for r in results]
+    
+    def _transaction_category_spending(self, user_id: int, month: str, year: int) -> Dict[str, float]:
+        """
+        Aggregate spending per category straight from transactions
+        Used to verify the incrementally maintained values
+        """
+        # Query all categories with their total spending
+        results = self.category_spending_query(user_id, self._budget_month(month, year)).all()
         
         return {category: round(amount, 2) for category, amount in results if category}
     
@@ -125,25 +210,75 @@ class BudgetService:
     
     def recalculate_all_budgets(self, user_id: int, month: str) -> List[Budget]:
         """Recalculate all budgets for a user for a specific month"""
-        try:
-            year = int(month.split('-')[0])
-        except (ValueError, IndexError):
-            year = datetime.now().year
+        self.recompute_month(month, min_user_id=user_id, max_user_id=user_id)
         
         budgets = self.db.query(Budget).filter(
             Budget.user_id == user_id,
             Budget.month == month
-        ).all()
-        
-        for budget in budgets:
-            month_num = int(month.split('-')[1]) if '-' in month else datetime.now().month
-            budget.spent_amount = self.calculate_spent_amount(user_id, budget.category, month, year)
-        
-        self.db.commit()
+        ).populate_existing().all()
         
         logger.info(f"Recalculated {len(budgets)} budgets for user {user_id} month {month}")
         return budgets
     
+    def recompute_month(
+        self,
+        month: str,
+        chunk_size: Optional[int] = None,
+        min_user_id: Optional[int] = None,
+        max_user_id: Optional[int] = None
+    ) -> Dict:
+        """
+        Refresh spent_amount for every budget of every user for a month with a
+        set-based UPDATE budgets ... FROM (aggregate subquery).
+        Runs as one statement, or one statement + commit per chunk of user ids.
+        Only rows whose value actually changes are written, and those are
+        evaluated against the alert thresholds before each commit.
+        """
+        start, next_start = month_bounds(month)
+        started = time.perf_counter()
+        
+        if min_user_id is None or max_user_id is None:
+            low, high = self.db.query(func.min(Budget.user_id), func.max(Budget.user_id)).filter(
+                Budget.month == month
+            ).one()
+            min_user_id = low if min_user_id is None else min_user_id
+            max_user_id = high if max_user_id is None else max_user_id
+        
+        rows_changed = 0
+        chunks = 0
+        evaluator = BudgetEvaluator(self.db)
+        if min_user_id is not None and max_user_id is not None:
+            step = chunk_size or (max_user_id - min_user_id + 1)
+            for chunk_start in range(min_user_id, max_user_id + 1, step):
+                rows = self.db.execute(RECOMPUTE_MONTH_SQL, {
+                    "month": month,
+                    "month_start": start.replace(tzinfo=None),
+                    "next_start": next_start.replace(tzinfo=None),
+                    "default_tz": DEFAULT_TIMEZONE,
+                    "min_user_id": chunk_start,
+                    "max_user_id": min(chunk_start + step - 1, max_user_id)
+                }).all()
+                for row in rows:
+                    evaluator.evaluate_values(
+                        row.id, row.user_id, row.category, row.month, row.spent_amount, row.limit_amount
+                    )
+                self.db.commit()
+                rows_changed += len(rows)
+                chunks += 1
+        
+        if rows_changed:
+            invalidate_shared_on_commit(self.db)
+            self.db.commit()
+        
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Recomputed budgets for {month}: {rows_changed} rows changed in {elapsed_ms}ms ({chunks} chunks)")
+        return {
+            "month": month,
+            "rows_changed": rows_changed,
+            "chunks": chunks,
+            "elapsed_ms": elapsed_ms
+        }
+    
     def get_budget_with_progress(self, budget_id: int, user_id: int) -> Optional[Dict]:
         """Get budget with progress percentage and status"""
         budget = self.db.query(Budget).filter(
@@ -154,75 +289,89 @@ class BudgetService:
         if not budget:
             return None
         
-        # Recalculate to get latest
-        budget = self.recalculate_budget(budget_id, user_id)
-        
-        progress = self.calculate_progress_percentage(budget.spent_amount, budget.limit_amount)
-        is_over = self.is_over_budget(budget.spent_amount, budget.limit_amount)
+        return self._budget_progress(budget)
+    
+    def _budget_progress(self, budget: Budget) -> Dict:
+        """Build the progress dict from the incrementally maintained spent_amount"""
+        spent = float(budget.spent_amount or 0)
+        limit_amount = float(budget.limit_amount or 0)
         
         return {
             "id": budget.id,
             "user_id": budget.user_id,
             "category": budget.category,
-            "limit_amount": budget.limit_amount,
-            "spent_amount": budget.spent_amount,
+            "limit_amount": limit_amount,
+            "spent_amount": spent,
             "month": budget.month,
-            "progress_percentage": progress,
-            "is_over_budget": is_over,
-            "remaining_amount": round(budget.limit_amount - budget.spent_amount, 2)
+            "progress_percentage": self.calculate_progress_percentage(spent, limit_amount),
+            "is_over_budget": self.is_over_budget(spent, limit_amount),
+            "remaining_amount": round(limit_amount - spent, 2)
         }
     
     def get_all_budgets_with_progress(self, user_id: int, month: Optional[str] = None) -> List[Dict]:
         """Get all budgets with progress information"""
         if month is None:
-            month = f"{datetime.now().year}-{datetime.now().month:02d}"
-        
-        try:
-            year = int(month.split('-')[0])
-        except (ValueError, IndexError):
-            year = datetime.now().year
+            month = current_month(get_user_timezone(self.db, user_id))
         
         budgets = self.db.query(Budget).filter(
             Budget.user_id == user_id,
             Budget.month == month
         ).all()
         
-        result = []
-        for budget in budgets:
-            month_num = int(month.split('-')[1]) if '-' in month else datetime.now().month
-            spent = self.calculate_spent_amount(user_id, budget.category, month, year)
-            budget.spent_amount = spent
-            self.db.commit()
-            
-            progress = self.calculate_progress_percentage(spent, budget.limit_amount)
-            is_over = self.is_over_budget(spent, budget.limit_amount)
+        return [self._budget_progress(budget) for budget in budgets]
+    
+    def reconcile_spent_amounts(self, user_id: Optional[int] = None, month: Optional[str] = None, fix: bool = True) -> List[Dict]:
+        """
+        Verify incrementally maintained spent_amount values against transactions
+        Runs one aggregate query per (user, month) and returns the budgets that drifted
+        """
+        query = self.db.query(Budget)
+        if user_id is not None:
+            query = query.filter(Budget.user_id == user_id)
+        if month is not None:
+            query = query.filter(Budget.month == month)
+        
+        budgets_by_period: Dict[Tuple[int, str], List[Budget]] = {}
+        for budget in query.all():
+            budgets_by_period.setdefault((budget.user_id, budget.month), []).append(budget)
+        
+        drift = []
+        for (budget_user_id, budget_month), budgets in budgets_by_period.items():
+            try:
+                year = int(budget_month.split('-')[0])
+            except (ValueError, IndexError, AttributeError):
+                continue
             
-            result.append({
-                "id": budget.id,
-                "user_id": budget.user_id,
-                "category": budget.category,
-                "limit_amount": budget.limit_amount,
-                "spent_amount": spent,
-                "month": budget.month,
-                "progress_percentage": progress,
-                "is_over_budget": is_over,
-                "remaining_amount": round(budget.limit_amount - spent, 2)
-            })
-        
-        return result
+            actual = self._transaction_category_spending(budget_user_id, budget_month, year)
+            for budget in budgets:
+                expected = float(actual.get(budget.category, 0))
+                stored = float(budget.spent_amount or 0)
+                if abs(expected - stored) < 0.005:
+                    continue
+                
+                drift.append({
+                    "budget_id": budget.id,
+                    "user_id": budget.user_id,
+                    "category": budget.category,
+                    "month": budget.month,
+                    "stored": stored,
+                    "actual": expected
+                })
+                if fix:
+                    budget.spent_amount = expected
+        
+        if fix:
+            self.db.flush()
+            evaluator = BudgetEvaluator(self.db)
+            for item in drift:
+                evaluator.evaluate(item["user_id"], item["category"], item["month"])
+            self.db.commit()
+        
+        logger.info(f"Reconciled {sum(len(b) for b in budgets_by_period.values())} budgets, {len(drift)} drifted")
+        return drift
     
     def create_budget(self, user_id: int, category: str, limit_amount: float, month: str) -> Budget:
         """Create a new budget"""
-        # Check if budget already exists
-        existing = self.db.query(Budget).filter(
-            Budget.user_id == user_id,
-            Budget.category == category,
-            Budget.month == month
-        ).first()
-        
-        if existing:
-            raise ValueError(f"Budget already exists for {category} in {month}")
-        
         # Calculate initial spent amount
         try:
             year = int(month.split('-')[0])
@@ -240,12 +389,136 @@ class BudgetService:
         )
         
         self.db.add(budget)
+        try:
+            # uq_budget_user_category_month settles concurrent creates
+            self.db.flush()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError(f"Budget already exists for {category} in {month}")
+        
+        BudgetEvaluator(self.db).evaluate_budget(budget)
         self.db.commit()
         self.db.refresh(budget)
         
         logger.info(f"Created budget: {category} = {limit_amount} for {month}")
         return budget
     
+    def bulk_upsert_budgets(self, budgets: List[Dict]) -> Dict:
+        """
+        Create or update many budgets with one INSERT ... ON CONFLICT (user_id, category, month)
+        DO UPDATE. New rows are seeded with spending from the category rollups
+        (one lookup query); existing rows only get their limit updated.
+        Raises ValueError if any month is not "YYYY-MM".
+        """
+        for b in budgets:
+            parse_month(b["month"])
+        
+        # ON CONFLICT can't touch the same row twice in one statement; last entry wins
+        rows_by_key = {(b["user_id"], b["category"], b["month"]): b for b in budgets}
+        if not rows_by_key:
+            return {"inserted": 0, "updated": 0, "budget_ids": []}
+        
+        spent_by_key = dict(
+            ((r.user_id, r.category, r.month), r.debit_total)
+            for r in self.db.query(
+                CategoryMonthlyRollup.user_id,
+                CategoryMonthlyRollup.category,
+                CategoryMonthlyRollup.month,
+                CategoryMonthlyRollup.debit_total
+            ).filter(
+                tuple_(
+                    CategoryMonthlyRollup.user_id,
+                    CategoryMonthlyRollup.category,
+                    CategoryMonthlyRollup.month
+                ).in_(list(rows_by_key))
+            )
+        )
+        
+        stmt = pg_insert(Budget).values([
+            {
+                "user_id": user_id,
+                "category": category,
+                "month": month,
+                "limit_amount": row["limit_amount"],
+                "spent_amount": spent_by_key.get((user_id, category, month), 0)
+            }
+            for (user_id, category, month), row in rows_by_key.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "category", "month"],
+            set_={"limit_amount": stmt.excluded.limit_amount}
+        ).returning(
+            Budget.id, Budget.user_id, Budget.category, Budget.month,
+            Budget.spent_amount, Budget.limit_amount,
+            literal_column("(xmax = 0)").label("inserted")
+        )
+        
+        rows = self.db.execute(stmt).all()
+        
+        # New limits may put budgets over a threshold
+        evaluator = BudgetEvaluator(self.db)
+        for row in rows:
+            evaluator.evaluate_values(row.id, row.user_id, row.category, row.month, row.spent_amount, row.limit_amount)
+        
+        invalidate_on_commit(self.db, {row.user_id for row in rows})
+        self.db.commit()
+        
+        inserted = sum(1 for row in rows if row.inserted)
+        logger.info(f"Bulk upserted {len(rows)} budgets ({inserted} new)")
+        return {"inserted": inserted, "updated": len(rows) - inserted, "budget_ids": [row.id for row in rows]}
+    
+    def rollover_budgets(self, from_month: str, to_month: str, user_id: Optional[int] = None) -> int:
+        """
+        Copy budgets from one month to another with a single INSERT ... SELECT
+        Covers every user unless user_id is given; budgets that already exist in
+        to_month are left alone. Spending is seeded from the category rollups
+        and the new budgets are evaluated against the alert thresholds.
+        Returns the number of budgets created; raises ValueError for a malformed month.
+        """
+        parse_month(from_month)
+        parse_month(to_month)
+        
+        source = select(
+            Budget.user_id,
+            Budget.category,
+            Budget.limit_amount,
+            func.coalesce(CategoryMonthlyRollup.debit_total, 0),
+            literal(to_month)
+        ).outerjoin(
+            CategoryMonthlyRollup,
+            and_(
+                CategoryMonthlyRollup.user_id == Budget.user_id,
+                CategoryMonthlyRollup.category == Budget.category,
+                CategoryMonthlyRollup.month == to_month
+            )
+        ).where(Budget.month == from_month)
+        
+        if user_id is not None:
+            source = source.where(Budget.user_id == user_id)
+        
+        stmt = pg_insert(Budget).from_select(
+            ["user_id", "category", "limit_amount", "spent_amount", "month"],
+            source
+        ).on_conflict_do_nothing(index_elements=["user_id", "category", "month"]).returning(
+            Budget.id, Budget.user_id, Budget.category, Budget.month,
+            Budget.spent_amount, Budget.limit_amount
+        )
+        
+        rows = self.db.execute(stmt).all()
+        created = len(rows)
+        
+        # Seeded spending may already cross a threshold of the new month
+        evaluator = BudgetEvaluator(self.db)
+        for row in rows:
+            evaluator.evaluate_values(row.id, row.user_id, row.category, row.month, row.spent_amount, row.limit_amount)
+        
+        if created:
+            invalidate_shared_on_commit(self.db, [user_id] if user_id is not None else None)
+        self.db.commit()
+        
+        logger.info(f"Rolled over {created} budgets from {from_month} to {to_month}")
+        return created
+    
     def update_budget(self, budget_id: int, user_id: int, **kwargs) -> Optional[Budget]:
         """Update an existing budget"""
         budget = self.db.query(Budget).filter(
@@ -260,6 +533,12 @@ class BudgetService:
             if hasattr(budget, key) and value is not None:
                 setattr(budget, key, value)
         
+        # Spending is tracked per (category, month), so moving a budget needs a fresh total
+        if kwargs.get("category") is not None or kwargs.get("month") is not None:
+            budget.spent_amount = self.calculate_month_spending(user_id, budget.category, budget.month)
+        
+        self.db.flush()
+        BudgetEvaluator(self.db).evaluate_budget(budget)
         self.db.commit()
         self.db.refresh(budget)
         
@@ -0,0 +1,140 @@
+"""
+Cashflow Service for Income vs Expense Time Series
+Aggregates transactions into day/week/month buckets over a sargable created_at
+range (or the user's in-memory transaction snapshot) and downsamples long
+ranges on the server to a bounded number of points
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, cast, Date, Integer, literal
+from app.models import Transaction
+from app.services.periods import get_user_timezone
+from app.services.transaction_snapshot import transaction_snapshots
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+import math
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CashflowService:
+    """Builds zero-filled cashflow series with at most max_points buckets"""
+
+    INTERVALS = ("day", "week", "month")
+    DEFAULT_MAX_POINTS = 366
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_series(
+        self,
+        user_id: int,
+        start: date,
+        end: date,
+        interval: str = "day",
+        max_points: int = DEFAULT_MAX_POINTS
+    ) -> Dict:
+        """
+        Income/expense per bucket for the inclusive [start, end] date range in the
+        user's timezone. If the requested interval would produce more than
+        max_points buckets, fixed-width buckets of N days are used instead.
+        Raises ValueError for an unknown interval or an empty range
+        """
+        if interval not in self.INTERVALS:
+            raise ValueError(f"Invalid interval '{interval}', expected one of {', '.join(self.INTERVALS)}")
+        if end < start:
+            raise ValueError("end must not be before start")
+        max_points = max(max_points, 1)
+
+        natural = self._natural_buckets(start, end, interval)
+        if len(natural) <= max_points:
+            bucket_starts, width_days = natural, None
+        else:
+            width_days = math.ceil(((end - start).days + 1) / max_points)
+            bucket_starts = [start + timedelta(days=d) for d in range(0, (end - start).days + 1, width_days)]
+
+        snapshot = transaction_snapshots.get(self.db, user_id)
+        if snapshot is not None:
+            totals = self._aggregate_snapshot(snapshot, user_id, start, end, bucket_starts)
+        else:
+            totals = self._aggregate(user_id, start, end, interval, width_days)
+
+        points = []
+        for bucket_start in bucket_starts:
+            income, expense, count = totals.get(bucket_start, (0.0, 0.0, 0))
+            points.append({
+                "period_start": bucket_start.isoformat(),
+                "income": income,
+                "expense": expense,
+                "net": round(income - expense, 2),
+                "txn_count": count
+            })
+
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "interval": f"{width_days}d" if width_days else interval,
+            "points": points
+        }
+
+    def _natural_buckets(self, start: date, end: date, interval: str) -> List[date]:
+        """Bucket start dates covering [start, end] for a calendar interval"""
+        if interval == "day":
+            return [start + timedelta(days=d) for d in range((end - start).days + 1)]
+        if interval == "week":
+            first = start - timedelta(days=start.weekday())  # ISO weeks, like date_trunc('week')
+            return [first + timedelta(weeks=w) for w in range((end - first).days // 7 + 1)]
+
+        buckets = []
+        year, month = start.year, start.month
+        while date(year, month, 1) <= end:
+            buckets.append(date(year, month, 1))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return buckets
+
+    def _aggregate_snapshot(self, snapshot, user_id: int, start: date, end: date, bucket_starts: List[date]) -> Dict:
+        """Same totals as _aggregate, sliced from the in-memory snapshot with searchsorted buckets"""
+        tz = get_user_timezone(self.db, user_id)
+        edges = [max(b, start) for b in bucket_starts] + [end + timedelta(days=1)]
+        boundaries = np.array([datetime(d.year, d.month, d.day, tzinfo=tz).timestamp() for d in edges])
+
+        buckets = snapshot.bucket_totals(boundaries)
+        return {
+            bucket_start: (round(float(income), 2), round(float(expense), 2), int(count))
+            for bucket_start, income, expense, count in zip(bucket_starts, buckets["income"], buckets["expense"], buckets["count"])
+            if count
+        }
+
+    def _aggregate(self, user_id: int, start: date, end: date, interval: str, width_days: Optional[int]) -> Dict:
+        """One grouped query: bucket start date -> (income, expense, txn_count)"""
+        tz = get_user_timezone(self.db, user_id)
+        local_time = func.timezone(tz.key, Transaction.created_at)
+        if width_days:
+            # Bucket arithmetic: index = days since start // width
+            offset = cast(local_time, Date) - literal(start)
+            bucket = cast(func.floor(offset / width_days), Integer).label("bucket")
+        else:
+            bucket = cast(func.date_trunc(interval, local_time), Date).label("bucket")
+
+        amount = Transaction.amount
+        range_start = datetime(start.year, start.month, start.day, tzinfo=tz)
+        range_end = datetime(end.year, end.month, end.day, tzinfo=tz) + timedelta(days=1)
+
+        results = self.db.query(
+            bucket,
+            func.coalesce(func.sum(amount).filter(amount > 0), 0).label("income"),
+            func.coalesce(func.sum(-amount).filter(amount < 0), 0).label("expense"),
+            func.count(Transaction.id).label("txn_count")
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.created_at >= range_start,
+            Transaction.created_at < range_end
+        ).group_by(bucket).all()
+
+        totals = {}
+        for r in results:
+            bucket_start = start + timedelta(days=r.bucket * width_days) if width_days else r.bucket
+            totals[bucket_start] = (round(float(r.income), 2), round(float(r.expense), 2), int(r.txn_count))
+        return totals
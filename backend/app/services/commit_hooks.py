@@ -0,0 +1,33 @@
+"""
+Commit Hooks for Session-Scoped Side Effects
+Runs in-process callbacks (pub/sub fan-out, cache bumps) only after the
+surrounding DB transaction commits, and drops them if it rolls back
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "after_commit_callbacks"
+
+
+def after_commit(db: Session, callback: Callable[[], None]):
+    """Run callback once the session's current transaction commits"""
+    db.info.setdefault(_PENDING_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending(session: Session):
+    callbacks = session.info.pop(_PENDING_KEY, [])
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception:
+            logger.exception("after-commit callback failed")
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
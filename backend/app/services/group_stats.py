@@ -0,0 +1,23 @@
+"""
+Grouped Statistics Helpers
+Per-group reductions over flat numpy arrays (group ids from np.unique(...,
+return_inverse=True)), shared by the batch detection jobs
+"""
+import numpy as np
+
+
+def group_medians(groups: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of values per group id (NaN for empty groups), without a Python loop over groups"""
+    medians = np.full(n_groups, np.nan)
+    if not len(values):
+        return medians
+
+    order = np.lexsort((values, groups))
+    sorted_groups = groups[order]
+    sorted_values = values[order]
+
+    present, starts, counts = np.unique(sorted_groups, return_index=True, return_counts=True)
+    lower = sorted_values[starts + (counts - 1) // 2]
+    upper = sorted_values[starts + counts // 2]
+    medians[present] = (lower + upper) / 2
+    return medians
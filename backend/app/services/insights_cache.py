@@ -0,0 +1,228 @@
+"""
+Insights Cache for Versioned Aggregate Results
+Caches insight responses under (user_id, endpoint, params, user data version).
+Any transaction, account or budget write for a user bumps that user's version
+once the write commits, so stale entries are never read again and simply age
+out of the backend
+
+The versions live in the process. Bulk rewrites (rollup rebuilds, budget
+recomputes and rollovers) usually run in a script or job process, so they also
+bump the shared "insights" row of cache_epochs in their own transaction; every
+API process re-reads that row at most every few seconds and treats a change as
+a global invalidation
+"""
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.database import engine
+from app.models import Account, Budget
+from app.services.commit_hooks import after_commit
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+from collections import OrderedDict
+from itertools import chain
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "insights_cache_users"
+
+SHARED_EPOCH_NAME = "insights"
+
+BUMP_SHARED_EPOCH_SQL = text("""
+    INSERT INTO cache_epochs (name, epoch, updated_at)
+    VALUES (:name, 1, now() AT TIME ZONE 'utc')
+    ON CONFLICT (name) DO UPDATE
+    SET epoch = cache_epochs.epoch + 1, updated_at = EXCLUDED.updated_at
+""")
+
+READ_SHARED_EPOCH_SQL = text("SELECT epoch FROM cache_epochs WHERE name = :name")
+
+
+class LRUCacheBackend:
+    """
+    In-process LRU backend with per-entry expiry
+    Any object with the same get/set/incr/clear methods (e.g. a Redis wrapper
+    shared by all workers) can be passed to InsightsCache instead
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._counters: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: Hashable) -> int:
+        """Increment a counter; counters are never evicted so versions can't go backwards"""
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key: Hashable) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class InsightsCache:
+    """Versioned result cache for per-user insight endpoints"""
+
+    # Upper bound on entry lifetime, e.g. for "current month" results across a month boundary
+    DEFAULT_TTL_SECONDS = 600
+    # How long a process trusts its last read of the shared epoch
+    SHARED_EPOCH_CHECK_SECONDS = 5
+
+    def __init__(self, backend=None, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+                 shared_epoch_check_seconds: Optional[float] = SHARED_EPOCH_CHECK_SECONDS):
+        self.backend = backend or LRUCacheBackend()
+        self.ttl_seconds = ttl_seconds
+        self.shared_epoch_check_seconds = shared_epoch_check_seconds
+        self.hits = 0
+        self.misses = 0
+        self._shared_epoch = 0
+        self._shared_checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def shared_epoch(self) -> int:
+        """
+        Last seen value of the cache_epochs row, re-read at most every
+        shared_epoch_check_seconds (None disables the check)
+        """
+        if self.shared_epoch_check_seconds is None:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            if self._shared_checked_at is not None and now - self._shared_checked_at < self.shared_epoch_check_seconds:
+                return self._shared_epoch
+            self._shared_checked_at = now
+        try:
+            with engine.connect() as conn:
+                epoch = conn.execute(READ_SHARED_EPOCH_SQL, {"name": SHARED_EPOCH_NAME}).scalar() or 0
+        except Exception:
+            logger.exception("Could not read the shared insights cache epoch")
+            return self._shared_epoch
+        with self._lock:
+            self._shared_epoch = epoch
+        return epoch
+
+    def version(self, user_id: int) -> tuple:
+        """Current data version of a user (either epoch invalidates everyone)"""
+        return (
+            self.shared_epoch(),
+            self.backend.counter(("epoch",)),
+            self.backend.counter(("user", user_id))
+        )
+
+    def key(self, user_id: int, endpoint: str, params: Optional[Dict] = None) -> tuple:
+        return (
+            "insights", user_id, endpoint,
+            tuple(sorted((params or {}).items())),
+            self.version(user_id)
+        )
+
+    def get_or_compute(self, user_id: int, endpoint: str, params: Optional[Dict], compute: Callable[[], Any]) -> Any:
+        """Return the cached result for the current version, computing and storing it on a miss"""
+        key = self.key(user_id, endpoint, params)
+        value = self.backend.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = compute()
+        self.backend.set(key, value, self.ttl_seconds)
+        return value
+
+    def invalidate_user(self, user_id: int):
+        self.backend.incr(("user", user_id))
+
+    def invalidate_all(self):
+        self.backend.incr(("epoch",))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend) if hasattr(self.backend, "__len__") else None
+        }
+
+
+# Shared cache for the API process
+insights_cache = InsightsCache()
+
+
+def invalidate_on_commit(db: Session, user_ids: Iterable[Optional[int]]):
+    """Bump the users' data versions once the session's transaction commits"""
+    pending = db.info.get(_PENDING_KEY)
+    if pending is None:
+        pending = db.info[_PENDING_KEY] = set()
+
+        def bump():
+            users = db.info.pop(_PENDING_KEY, set())
+            for user_id in users:
+                insights_cache.invalidate_user(user_id)
+
+        after_commit(db, bump)
+    pending.update(uid for uid in user_ids if uid is not None)
+
+
+def invalidate_shared_on_commit(db: Session, user_ids: Optional[Iterable[Optional[int]]] = None):
+    """
+    For bulk rewrites: bump the shared epoch in the session's transaction, so other
+    processes drop their entries within a few seconds of the commit; this process
+    invalidates user_ids (everyone when None) as soon as it commits
+    """
+    db.execute(BUMP_SHARED_EPOCH_SQL, {"name": SHARED_EPOCH_NAME})
+    if user_ids is None:
+        after_commit(db, insights_cache.invalidate_all)
+    else:
+        invalidate_on_commit(db, user_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_writes(session: Session, flush_context):
+    """ORM writes to accounts and budgets invalidate their owner's insights"""
+    users = {
+        obj.user_id
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, (Account, Budget))
+    }
+    if users:
+        invalidate_on_commit(session, users)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
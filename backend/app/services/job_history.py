@@ -0,0 +1,24 @@
+"""
+Job History Helpers
+Reads results recorded in job_runs, so incremental jobs can continue from the
+watermark or cursor their last successful run left behind
+"""
+from sqlalchemy.orm import Session
+from app.models import JobRun
+from typing import Dict, Optional
+import json
+
+
+def last_successful_result(db: Session, job_name: str) -> Optional[Dict]:
+    """Decoded result of the newest successful run of a job (None if there is none)"""
+    details = db.query(JobRun.details).filter(
+        JobRun.job_name == job_name,
+        JobRun.status == "success"
+    ).order_by(JobRun.started_at.desc()).limit(1).scalar()
+    if not details:
+        return None
+    try:
+        result = json.loads(details)
+    except ValueError:
+        return None
+    return result if isinstance(result, dict) else None
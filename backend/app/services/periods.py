@@ -0,0 +1,80 @@
+"""
+Period helpers for month-based filtering
+Turns "YYYY-MM" months into half-open [start, next_start) ranges in the user's
+timezone so filters on created_at stay sargable and can use its indexes
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from app.models import User
+from typing import Optional, Tuple
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Timezone used when a user hasn't set one
+DEFAULT_TIMEZONE = "Asia/Kolkata"
+
+
+def get_timezone(name: Optional[str]) -> ZoneInfo:
+    """Resolve a timezone name, falling back to the default"""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def get_user_timezone(db: Session, user_id: int) -> ZoneInfo:
+    """Get a user's timezone (primary-key lookup)"""
+    name = db.query(User.timezone).filter(User.id == user_id).scalar()
+    return get_timezone(name)
+
+
+def parse_month(month: str) -> Tuple[int, int]:
+    """Parse a "YYYY-MM" string into (year, month); raises ValueError if malformed"""
+    try:
+        year_str, month_str = month.split('-')
+        year, month_int = int(year_str), int(month_str)
+    except (ValueError, AttributeError):
+        raise ValueError(f"Invalid month '{month}', expected YYYY-MM")
+
+    if not 1 <= month_int <= 12:
+        raise ValueError(f"Invalid month '{month}', expected YYYY-MM")
+    return year, month_int
+
+
+def shift_month(month: str, offset: int) -> str:
+    """Move a "YYYY-MM" month forwards (or backwards) by offset months"""
+    year, month_int = parse_month(month)
+    index = year * 12 + (month_int - 1) + offset
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def month_bounds(month: str, tz: Optional[ZoneInfo] = None) -> Tuple[datetime, datetime]:
+    """Get the half-open [start, next_start) range of a month as aware datetimes"""
+    tz = tz or get_timezone(None)
+    year, month_int = parse_month(month)
+    next_year, next_month = parse_month(shift_month(month, 1))
+    return (
+        datetime(year, month_int, 1, tzinfo=tz),
+        datetime(next_year, next_month, 1, tzinfo=tz)
+    )
+
+
+def month_range(column, month: str, tz: Optional[ZoneInfo] = None):
+    """Sargable predicate matching rows of a timestamp column that fall in a month"""
+    start, end = month_bounds(month, tz)
+    return and_(column >= start, column < end)
+
+
+def month_key(value: Optional[datetime], tz: Optional[ZoneInfo] = None) -> str:
+    """Month ("YYYY-MM") a timestamp falls in, in the given timezone"""
+    tz = tz or get_timezone(None)
+    if value is None:
+        return datetime.now(tz).strftime('%Y-%m')
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(tz).strftime('%Y-%m')
+
+
+def current_month(tz: Optional[ZoneInfo] = None) -> str:
+    """Current month ("YYYY-MM") in the given timezone"""
+    return month_key(None, tz)
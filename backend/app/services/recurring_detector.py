@@ -0,0 +1,369 @@
+"""
+Recurring Payment Detector for Bill Suggestions
+Groups each user's debits by normalized merchant, measures how regular the
+payment intervals and amounts are with NumPy across all merchants of a chunk of
+users, and proposes (or creates) bills for the recurring ones. Runs are
+incremental: only merchants with transactions newer than the last run are rescored,
+and proposals that stopped recurring are withdrawn.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, or_
+from sqlalchemy.dialects.postgresql import insert
+from app.models import Transaction, Bill, RecurringPayment
+from app.services.job_history import last_successful_result
+from app.services.group_stats import group_medians
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import re
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tokens that vary between payments to the same merchant or carry no meaning
+NOISE_WORDS = {"pos", "upi", "ach", "nach", "imps", "neft", "debit", "card", "txn", "ref", "payment", "to", "the",
+               "ltd", "pvt", "inc", "www", "com", "in"}
+
+SECONDS_PER_DAY = 86400.0
+
+
+def normalize_merchant(description: Optional[str]) -> str:
+    """Merchant key of a transaction description: lowercase words without digits, refs or noise"""
+    words = re.sub(r"[^a-z&]+", " ", (description or "").lower()).split()
+    return " ".join([w for w in words if w not in NOISE_WORDS][:3])
+
+
+def normalize_merchants(descriptions) -> np.ndarray:
+    """Merchant keys of many descriptions; each distinct description is normalized once"""
+    raw = np.array([d or "" for d in descriptions], dtype=object).astype(str)
+    if not len(raw):
+        return raw
+    distinct, inverse = np.unique(raw, return_inverse=True)
+    return np.array([normalize_merchant(d) for d in distinct], dtype=object).astype(str)[inverse]
+
+
+class RecurringDetector:
+    """Batch job that finds recurring payments in transaction history"""
+
+    JOB_NAME = "recurring_detection"
+
+    STATUS_CANDIDATE = "candidate"
+    STATUS_PROPOSED = "proposed"
+    STATUS_ACCEPTED = "accepted"
+    STATUS_DISMISSED = "dismissed"
+
+    # Detection defaults
+    LOOKBACK_DAYS = 400
+    MIN_OCCURRENCES = 3
+    MIN_INTERVAL_DAYS = 6
+    MAX_INTERVAL_DAYS = 380
+    MAX_INTERVAL_DEVIATION = 0.15  # median absolute deviation of the intervals / median interval
+    MAX_AMOUNT_CV = 0.25
+    STALE_INTERVALS = 2.0  # no payment for this many intervals: no longer recurring
+    CHUNK_USERS = 1000
+    # Transactions committed late with an id below the last watermark are still
+    # picked up when created this close to the last run (rescoring is idempotent)
+    WATERMARK_OVERLAP = timedelta(minutes=10)
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def watermark(self) -> Tuple[int, Optional[datetime]]:
+        """
+        Newest transaction id covered by the last successful run and when that run
+        started ((0, None) before the first)
+        """
+        last = last_successful_result(self.db, self.JOB_NAME) or {}
+        try:
+            since = int(last["watermark"])
+        except (KeyError, TypeError, ValueError):
+            return 0, None
+        try:
+            return since, datetime.fromisoformat(last["watermark_time"])
+        except (KeyError, TypeError, ValueError):
+            return since, None
+
+    def _is_active(self, now: datetime):
+        """SQL condition: the last payment is recent enough for the merchant to still recur"""
+        return RecurringPayment.last_seen >= now - func.make_interval(
+            0, 0, 0, 0, 0, 0, RecurringPayment.interval_days * (self.STALE_INTERVALS * SECONDS_PER_DAY)
+        )
+
+    def withdraw_stale(self, now: datetime) -> int:
+        """Move proposals whose payments stopped back to candidates; does not commit"""
+        return self.db.query(RecurringPayment).filter(
+            RecurringPayment.status == self.STATUS_PROPOSED,
+            ~self._is_active(now)
+        ).update({"status": self.STATUS_CANDIDATE}, synchronize_session=False)
+
+    def run(
+        self,
+        since_transaction_id: Optional[int] = None,
+        now: Optional[datetime] = None,
+        auto_create: bool = False,
+        chunk_users: int = CHUNK_USERS
+    ) -> Dict:
+        """
+        Rescore every (user, merchant) with debits after since_transaction_id (default:
+        the last run's watermark, plus anything created shortly before that run started),
+        committing per chunk of users. Recurring merchants are proposed, or turned into
+        bills when auto_create is set; stale proposals are withdrawn. Returns counts and
+        the new watermark for the next run
+        """
+        started = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        if since_transaction_id is None:
+            since, since_time = self.watermark()
+        else:
+            since, since_time = since_transaction_id, None
+        high = self.db.query(func.max(Transaction.id)).scalar() or since
+
+        new_debits = Transaction.id > since
+        if since_time is not None:
+            new_debits = or_(new_debits, Transaction.created_at >= since_time - self.WATERMARK_OVERLAP)
+
+        new_rows = self.db.query(Transaction.user_id, Transaction.description).filter(
+            new_debits,
+            Transaction.id <= high,
+            Transaction.amount < 0,
+            Transaction.user_id.isnot(None)
+        ).all()
+
+        affected: Dict[int, set] = {}
+        if new_rows:
+            new_users = np.array([row.user_id for row in new_rows])
+            new_merchants = normalize_merchants([row.description for row in new_rows])
+            known = new_merchants != ""
+            for user_id, merchant in zip(new_users[known].tolist(), new_merchants[known].tolist()):
+                affected.setdefault(user_id, set()).add(merchant)
+
+        user_ids = sorted(affected)
+        merchants = 0
+        recurring = 0
+        bills_created = 0
+        for i in range(0, len(user_ids), chunk_users):
+            chunk = {u: affected[u] for u in user_ids[i:i + chunk_users]}
+            result = self.scan_users(chunk, high, now, auto_create)
+            self.db.commit()
+            merchants += result["merchants"]
+            recurring += result["recurring"]
+            bills_created += result["bills_created"]
+
+        withdrawn = self.withdraw_stale(now)
+        self.db.commit()
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Recurring detection: {merchants} merchants rescored for {len(user_ids)} users, "
+                    f"{recurring} recurring, {bills_created} bills created, {withdrawn} stale proposals withdrawn "
+                    f"in {elapsed_ms}ms")
+        return {
+            "users": len(user_ids),
+            "merchants": merchants,
+            "recurring": recurring,
+            "bills_created": bills_created,
+            "withdrawn": withdrawn,
+            "watermark": high,
+            "watermark_time": now.isoformat(),
+            "elapsed_ms": elapsed_ms
+        }
+
+    def scan_users(self, merchants_by_user: Dict[int, set], high: int, now: datetime, auto_create: bool) -> Dict:
+        """Load the chunk's debit history in bulk, score the affected merchants and upsert them; does not commit"""
+        rows = self.db.query(
+            Transaction.id,
+            Transaction.user_id,
+            Transaction.description,
+            Transaction.category,
+            -Transaction.amount,
+            func.extract('epoch', Transaction.created_at)
+        ).filter(
+            Transaction.user_id.in_(list(merchants_by_user)),
+            Transaction.id <= high,
+            Transaction.amount < 0,
+            Transaction.created_at >= now - timedelta(days=self.LOOKBACK_DAYS)
+        ).all()
+
+        if not rows:
+            return {"merchants": 0, "recurring": 0, "bills_created": 0}
+
+        txn_ids, user_ids, descriptions, categories, amounts, epochs = zip(*rows)
+        # (user, merchant) key of every row; only the affected merchants are rescored
+        keys = np.char.add(
+            np.char.add(np.array(user_ids).astype(str), "\x1f"),
+            normalize_merchants(descriptions)
+        )
+        wanted = [f"{u}\x1f{m}" for u, merchants in merchants_by_user.items() for m in merchants]
+        selected = np.isin(keys, wanted)
+        if not selected.any():
+            return {"merchants": 0, "recurring": 0, "bills_created": 0}
+
+        txn_ids = np.array(txn_ids)[selected]
+        categories = np.array(categories, dtype=object)[selected]
+        amounts = np.array(amounts, dtype=float)[selected]
+        epochs = np.array(epochs, dtype=float)[selected]
+
+        # One group per (user, merchant)
+        group_keys, groups = np.unique(keys[selected], return_inverse=True)
+        stats = periodicity_stats(groups, epochs, amounts, len(group_keys))
+
+        is_recurring = (
+            (stats["occurrences"] >= self.MIN_OCCURRENCES)
+            & (stats["interval_days"] >= self.MIN_INTERVAL_DAYS)
+            & (stats["interval_days"] <= self.MAX_INTERVAL_DAYS)
+            & (stats["interval_deviation"] <= self.MAX_INTERVAL_DEVIATION)
+            & (stats["amount_cv"] <= self.MAX_AMOUNT_CV)
+            & (now.timestamp() - stats["last_epoch"] <= stats["interval_days"] * SECONDS_PER_DAY * self.STALE_INTERVALS)
+        )
+
+        payments = []
+        for g, key in enumerate(group_keys):
+            user_id, merchant = key.split("\x1f", 1)
+            last = stats["last_index"][g]
+            interval = _optional(stats["interval_days"][g])
+            last_seen = datetime.fromtimestamp(stats["last_epoch"][g], timezone.utc)
+            payments.append({
+                "user_id": int(user_id),
+                "merchant": merchant,
+                "category": categories[last],
+                "occurrences": int(stats["occurrences"][g]),
+                "last_transaction_id": int(txn_ids[last]),
+                "interval_days": interval,
+                "interval_deviation": _optional(stats["interval_deviation"][g]),
+                "amount": round(float(stats["amount"][g]), 2),
+                "amount_cv": _optional(stats["amount_cv"][g]),
+                "last_seen": last_seen,
+                "next_due": last_seen + timedelta(days=interval) if interval else None,
+                "status": self.STATUS_PROPOSED if is_recurring[g] else self.STATUS_CANDIDATE,
+                "updated_at": datetime.utcnow()
+            })
+
+        stmt = insert(RecurringPayment).values(payments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "merchant"],
+            set_={
+                **{column: stmt.excluded[column] for column in (
+                    "category", "occurrences", "last_transaction_id", "interval_days", "interval_deviation",
+                    "amount", "amount_cv", "last_seen", "next_due", "updated_at"
+                )},
+                # The user's accept / dismiss decision sticks
+                "status": case(
+                    (RecurringPayment.status.in_([self.STATUS_ACCEPTED, self.STATUS_DISMISSED]), RecurringPayment.status),
+                    else_=stmt.excluded.status
+                )
+            }
+        )
+        self.db.execute(stmt)
+
+        bills_created = 0
+        if auto_create:
+            proposed = self.db.query(RecurringPayment).filter(
+                RecurringPayment.user_id.in_(list(merchants_by_user)),
+                RecurringPayment.status == self.STATUS_PROPOSED,
+                RecurringPayment.bill_id.is_(None),
+                self._is_active(now)
+            ).all()
+            for payment in proposed:
+                self._create_bill(payment)
+                bills_created += 1
+
+        return {"merchants": len(payments), "recurring": int(is_recurring.sum()), "bills_created": bills_created}
+
+    def get_suggestions(self, user_id: int) -> List[RecurringPayment]:
+        """
+        Proposed recurring payments of a user that are not bills yet and still recur,
+        soonest due first
+        """
+        return self.db.query(RecurringPayment).filter(
+            RecurringPayment.user_id == user_id,
+            RecurringPayment.status == self.STATUS_PROPOSED,
+            self._is_active(datetime.now(timezone.utc))
+        ).order_by(RecurringPayment.next_due.asc()).all()
+
+    def accept(self, user_id: int, payment_id: int) -> Optional[Bill]:
+        """Turn a proposed recurring payment into a bill; None if it isn't the user's proposal"""
+        payment = self.db.query(RecurringPayment).filter(
+            RecurringPayment.id == payment_id,
+            RecurringPayment.user_id == user_id,
+            RecurringPayment.status == self.STATUS_PROPOSED,
+            self._is_active(datetime.now(timezone.utc))
+        ).first()
+        if not payment:
+            return None
+
+        bill = self._create_bill(payment)
+        self.db.commit()
+        self.db.refresh(bill)
+        return bill
+
+    def dismiss(self, user_id: int, payment_id: int) -> bool:
+        """Stop proposing a recurring payment; later runs keep the decision"""
+        updated = self.db.query(RecurringPayment).filter(
+            RecurringPayment.id == payment_id,
+            RecurringPayment.user_id == user_id,
+            RecurringPayment.status == self.STATUS_PROPOSED
+        ).update({"status": self.STATUS_DISMISSED}, synchronize_session=False)
+        self.db.commit()
+        return updated > 0
+
+    def _create_bill(self, payment: RecurringPayment) -> Bill:
+        # bills.due_date is naive UTC
+        due_date = payment.next_due.astimezone(timezone.utc).replace(tzinfo=None) if payment.next_due else None
+        bill = Bill(
+            user_id=payment.user_id,
+            bill_name=payment.merchant.title(),
+            amount=float(payment.amount or 0),
+            due_date=due_date,
+            category=payment.category,
+            is_paid=False
+        )
+        self.db.add(bill)
+        self.db.flush()
+        payment.bill_id = bill.id
+        payment.status = self.STATUS_ACCEPTED
+        return bill
+
+
+def periodicity_stats(groups: np.ndarray, epochs: np.ndarray, amounts: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+    """
+    Per-group payment regularity, for all groups at once: occurrences, median interval
+    in days and its relative median absolute deviation, median amount and amount
+    coefficient of variation, plus the epoch and row index of each group's last payment
+    """
+    order = np.lexsort((epochs, groups))
+    sorted_groups = groups[order]
+    sorted_epochs = epochs[order]
+
+    occurrences = np.bincount(groups, minlength=n_groups)
+    last_index = order[np.cumsum(occurrences) - 1]
+
+    # Gaps between consecutive payments of the same group
+    same = sorted_groups[1:] == sorted_groups[:-1]
+    interval_groups = sorted_groups[1:][same]
+    intervals = np.diff(sorted_epochs)[same] / SECONDS_PER_DAY
+    interval_days = group_medians(interval_groups, intervals, n_groups)
+    interval_mad = group_medians(interval_groups, np.abs(intervals - interval_days[interval_groups]), n_groups)
+
+    mean_amount = np.bincount(groups, weights=amounts, minlength=n_groups) / np.maximum(occurrences, 1)
+    variance = np.bincount(groups, weights=(amounts - mean_amount[groups]) ** 2, minlength=n_groups) / np.maximum(occurrences, 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        interval_deviation = np.where(interval_days > 0, interval_mad / interval_days, np.inf)
+        amount_cv = np.where(mean_amount > 0, np.sqrt(variance) / mean_amount, np.inf)
+
+    return {
+        "occurrences": occurrences,
+        "interval_days": interval_days,
+        "interval_deviation": interval_deviation,
+        "amount": group_medians(groups, amounts, n_groups),
+        "amount_cv": amount_cv,
+        "last_epoch": epochs[last_index],
+        "last_index": last_index
+    }
+
+
+def _optional(value) -> Optional[float]:
+    """Plain float for a stats value, None for NaN / infinity"""
+    value = float(value)
+    return round(value, 4) if np.isfinite(value) else None
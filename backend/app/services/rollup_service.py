@@ -0,0 +1,220 @@
+"""
+Rollup Service for Per-User Monthly Category Totals
+Reads and rebuilds the category_monthly_rollups table that feeds budgets and insights
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case, select, insert, text
+from app.models import CategoryMonthlyRollup, Transaction, User
+from app.services.periods import DEFAULT_TIMEZONE, get_user_timezone, current_month, shift_month
+from app.services.insights_cache import invalidate_shared_on_commit
+from typing import List, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rollup key used for transactions without a category
+UNCATEGORIZED_KEY = ""
+
+# Every (month, category) cell of a trend window, zero where nothing was spent;
+# the rollup side is a primary-key range probe for the user
+CATEGORY_TRENDS_SQL = text("""
+    SELECT to_char(m.month_start, 'YYYY-MM') AS month, c.category, COALESCE(r.debit_total, 0) AS amount
+    FROM generate_series(CAST(:start AS date), CAST(:end AS date), interval '1 month') AS m(month_start)
+    CROSS JOIN unnest(CAST(:categories AS varchar[])) AS c(category)
+    LEFT JOIN category_monthly_rollups AS r
+      ON r.user_id = :user_id
+     AND r.month BETWEEN :start_month AND :end_month
+     AND r.month = to_char(m.month_start, 'YYYY-MM')
+     AND r.category = c.category
+    ORDER BY m.month_start, c.category
+""")
+
+
+class RollupService:
+    """Reads dashboard aggregates from the rollup table instead of raw transactions"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def category_label(category_key: Optional[str]) -> str:
+        """Display name for a rollup category key"""
+        return category_key or "Uncategorized"
+
+    def get_category_totals(self, user_id: int, month: Optional[str] = None) -> List[Dict]:
+        """
+        Get debit/credit totals per category for a month (or across all months)
+        Reads at most one row per category per month
+        """
+        query = self.db.query(
+            CategoryMonthlyRollup.category,
+            func.sum(CategoryMonthlyRollup.debit_total).label('debit_total'),
+            func.sum(CategoryMonthlyRollup.credit_total).label('credit_total'),
+            func.sum(CategoryMonthlyRollup.txn_count).label('txn_count')
+        ).filter(CategoryMonthlyRollup.user_id == user_id)
+
+        if month:
+            query = query.filter(CategoryMonthlyRollup.month == month)
+
+        results = query.group_by(CategoryMonthlyRollup.category).all()
+
+        return [
+            {
+                "category": r.category,
+                "debit_total": float(r.debit_total or 0),
+                "credit_total": float(r.credit_total or 0),
+                "txn_count": int(r.txn_count or 0)
+            }
+            for r in results
+        ]
+
+    def get_totals(self, user_id: int, month: Optional[str] = None) -> Dict:
+        """Get total debits and credits for a month (or across all months)"""
+        query = self.db.query(
+            func.coalesce(func.sum(CategoryMonthlyRollup.debit_total), 0),
+            func.coalesce(func.sum(CategoryMonthlyRollup.credit_total), 0)
+        ).filter(CategoryMonthlyRollup.user_id == user_id)
+
+        if month:
+            query = query.filter(CategoryMonthlyRollup.month == month)
+
+        debit_total, credit_total = query.one()
+        return {"debit_total": float(debit_total), "credit_total": float(credit_total)}
+
+    def get_month_overview(self, user_id: int, month: str, previous_month: str) -> Dict:
+        """
+        Income, expense and per-category splits for a month and the month before,
+        in one scan of the user's rollup rows using SUM(...) FILTER (WHERE ...)
+        """
+        current = CategoryMonthlyRollup.month == month
+        previous = CategoryMonthlyRollup.month == previous_month
+        
+        results = self.db.query(
+            CategoryMonthlyRollup.category,
+            func.sum(CategoryMonthlyRollup.debit_total).filter(current).label('expense'),
+            func.sum(CategoryMonthlyRollup.credit_total).filter(current).label('income'),
+            func.sum(CategoryMonthlyRollup.txn_count).filter(current).label('txn_count'),
+            func.sum(CategoryMonthlyRollup.debit_total).filter(previous).label('previous_expense'),
+            func.sum(CategoryMonthlyRollup.credit_total).filter(previous).label('previous_income')
+        ).filter(
+            CategoryMonthlyRollup.user_id == user_id,
+            CategoryMonthlyRollup.month.in_([month, previous_month])
+        ).group_by(CategoryMonthlyRollup.category).all()
+        
+        categories = [
+            {
+                "category": r.category,
+                "expense": float(r.expense or 0),
+                "income": float(r.income or 0),
+                "txn_count": int(r.txn_count or 0),
+                "previous_expense": float(r.previous_expense or 0),
+                "previous_income": float(r.previous_income or 0)
+            }
+            for r in results
+        ]
+        
+        return {
+            "total_income": sum(c["income"] for c in categories),
+            "total_expense": sum(c["expense"] for c in categories),
+            "txn_count": sum(c["txn_count"] for c in categories),
+            "previous_income": sum(c["previous_income"] for c in categories),
+            "previous_expense": sum(c["previous_expense"] for c in categories),
+            "categories": categories
+        }
+    
+    def get_category_trend(self, user_id: int, category: str, months: int) -> List[Dict]:
+        """Get monthly debit totals for one category over the last months, newest first (zero-filled)"""
+        trends = self.get_category_trends(user_id, [category], months)
+        amounts = trends["series"][0]["amounts"] if trends["series"] else []
+        return [
+            {"month": month, "amount": amount}
+            for month, amount in reversed(list(zip(trends["months"], amounts)))
+        ]
+
+    def get_category_trends(
+        self,
+        user_id: int,
+        categories: List[str],
+        months: int,
+        end_month: Optional[str] = None
+    ) -> Dict:
+        """
+        Monthly debit totals for many categories over a window of months ending at
+        end_month (default: the user's current month), in one query. Months without
+        spending are returned as 0, so every series has one value per month.
+        Raises ValueError for a malformed end_month
+        """
+        months = max(months, 1)
+        end_month = shift_month(end_month or current_month(get_user_timezone(self.db, user_id)), 0)
+        start_month = shift_month(end_month, -(months - 1))
+        month_list = [shift_month(start_month, i) for i in range(months)]
+
+        # Display labels map back to rollup keys ("Uncategorized" -> "")
+        keys = list(dict.fromkeys(
+            UNCATEGORIZED_KEY if c == self.category_label(UNCATEGORIZED_KEY) else c
+            for c in categories
+        ))
+        if not keys:
+            return {"months": month_list, "series": []}
+
+        rows = self.db.execute(CATEGORY_TRENDS_SQL, {
+            "user_id": user_id,
+            "categories": keys,
+            "start": f"{start_month}-01",
+            "end": f"{end_month}-01",
+            "start_month": start_month,
+            "end_month": end_month
+        }).all()
+
+        amounts: Dict[str, List[float]] = {key: [] for key in keys}
+        for row in rows:
+            amounts[row.category].append(float(row.amount))
+
+        return {
+            "months": month_list,
+            "series": [
+                {"category": self.category_label(key), "amounts": amounts[key], "total": round(sum(amounts[key]), 2)}
+                for key in keys
+            ]
+        }
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """
+        Rebuild rollups from raw transactions with a single INSERT ... SELECT
+        Rebuilds every user when user_id is None; returns the number of rollup rows written
+        """
+        delete_query = self.db.query(CategoryMonthlyRollup)
+        if user_id is not None:
+            delete_query = delete_query.filter(CategoryMonthlyRollup.user_id == user_id)
+        delete_query.delete(synchronize_session=False)
+
+        # Bucket by month in each user's own timezone, matching SpendingTracker
+        local_time = func.timezone(func.coalesce(User.timezone, DEFAULT_TIMEZONE), Transaction.created_at)
+        month_expr = func.to_char(local_time, 'YYYY-MM')
+        category_expr = func.coalesce(Transaction.category, UNCATEGORIZED_KEY)
+
+        aggregate = select(
+            Transaction.user_id,
+            month_expr,
+            category_expr,
+            func.coalesce(func.sum(case((Transaction.amount < 0, -Transaction.amount), else_=0)), 0),
+            func.coalesce(func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)), 0),
+            func.count(Transaction.id)
+        ).select_from(Transaction).join(User, User.id == Transaction.user_id)
+
+        if user_id is not None:
+            aggregate = aggregate.where(Transaction.user_id == user_id)
+
+        aggregate = aggregate.group_by(Transaction.user_id, month_expr, category_expr)
+
+        result = self.db.execute(
+            insert(CategoryMonthlyRollup).from_select(
+                ["user_id", "month", "category", "debit_total", "credit_total", "txn_count"],
+                aggregate
+            )
+        )
+        invalidate_shared_on_commit(self.db, [user_id] if user_id is not None else None)
+        self.db.commit()
+
+        logger.info(f"Rebuilt {result.rowcount} category rollups" + (f" for user {user_id}" if user_id is not None else ""))
+        return result.rowcount
@@ -0,0 +1,151 @@
+"""
+Job Scheduler for Periodic Background Work
+Runs registered jobs on fixed intervals in a daemon thread inside the API
+process and records every run (status, duration, result) in job_runs
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from app.database import SessionLocal, engine
+from app.models import JobRun
+from app.services.budget_evaluator import BudgetEvaluator
+from app.services.anomaly_detector import AnomalyDetector
+from app.services.balance_snapshots import BalanceSnapshotService
+from app.services.bill_reminders import BillReminderService
+from app.services.recurring_detector import RecurringDetector
+from typing import Callable, Dict, List, Optional
+from datetime import datetime
+import json
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob:
+    """A named job function run every interval_seconds with a fresh session"""
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable, count_key: Optional[str] = None):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.count_key = count_key  # result key stored as job_runs.rows_affected
+        self.next_run = time.monotonic() + interval_seconds
+
+
+class JobScheduler:
+    """Interval scheduler; with several API workers, an advisory lock lets one of them run each job"""
+
+    def __init__(self, tick_seconds: float = 1.0):
+        self.tick_seconds = tick_seconds
+        self.jobs: List[ScheduledJob] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, interval_seconds: float, func: Callable, count_key: Optional[str] = None):
+        """Register func(db) -> dict to run every interval_seconds"""
+        self.jobs.append(ScheduledJob(name, interval_seconds, func, count_key))
+
+    def start(self):
+        if self._thread or not self.jobs:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Scheduler started with jobs {[job.name for job in self.jobs]}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.tick_seconds):
+            now = time.monotonic()
+            for job in self.jobs:
+                if now >= job.next_run:
+                    try:
+                        self.run_job(job)
+                    except Exception:
+                        logger.exception(f"Could not run job {job.name}")
+                    job.next_run = time.monotonic() + job.interval_seconds
+
+    def run_job(self, job: ScheduledJob) -> Optional[Dict]:
+        """Run a job once and record it; returns None when another worker holds its lock"""
+        # Session-level advisory lock on a dedicated connection, since the job's
+        # session hands its connection back to the pool on every commit
+        with engine.connect() as lock_conn:
+            locked = lock_conn.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": job.name}
+            ).scalar()
+            lock_conn.commit()
+            if not locked:
+                logger.info(f"Job {job.name} is already running elsewhere, skipping")
+                return None
+            try:
+                return self._run_locked(job)
+            finally:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": job.name})
+                lock_conn.commit()
+
+    def _run_locked(self, job: ScheduledJob) -> Dict:
+        db = SessionLocal()
+        try:
+            run = JobRun(job_name=job.name, status="running", started_at=datetime.utcnow())
+            db.add(run)
+            db.commit()
+            run_id = run.id
+
+            started = time.perf_counter()
+            try:
+                result = job.func(db) or {}
+                status, details = "success", json.dumps(result, default=str)
+            except Exception as e:
+                db.rollback()
+                logger.exception(f"Job {job.name} failed")
+                result, status, details = {}, "failed", str(e)
+
+            run = db.get(JobRun, run_id)
+            run.status = status
+            run.finished_at = datetime.utcnow()
+            run.elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+            run.rows_affected = result.get(job.count_key) if job.count_key else None
+            run.details = details
+            db.commit()
+            return result
+        finally:
+            db.close()
+
+
+# Users per INSERT ... SELECT in the scheduled breach scan
+BUDGET_SCAN_CHUNK_SIZE = 10000
+
+
+def budget_breach_scan(db: Session) -> Dict:
+    """Scheduled job: raise missing budget threshold alerts for all users"""
+    return BudgetEvaluator(db).scan_all(chunk_size=BUDGET_SCAN_CHUNK_SIZE)
+
+
+def anomaly_scan(db: Session) -> Dict:
+    """Scheduled job: flag unusual debits from the last day across all users"""
+    return AnomalyDetector(db).run()
+
+
+def balance_snapshot(db: Session) -> Dict:
+    """Scheduled job: write end-of-day account balances and net worth for all users"""
+    return BalanceSnapshotService(db).snapshot()
+
+
+def bill_reminders(db: Session) -> Dict:
+    """Scheduled job: remind users of unpaid bills that are due soon"""
+    return BillReminderService(db).run()
+
+
+def recurring_detection(db: Session) -> Dict:
+    """Scheduled job: rescore merchants with new debits and propose recurring bills"""
+    return RecurringDetector(db).run()
+
+
+# Shared scheduler for the API process (jobs are registered in app.main)
+scheduler = JobScheduler()
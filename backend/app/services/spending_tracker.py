@@ -0,0 +1,147 @@
+"""
+Spending Tracker Service for Incremental Budget and Rollup Maintenance
+Applies signed spending deltas to budgets and category rollups as transactions are written
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from app.models import Budget, Account, CategoryMonthlyRollup
+from app.services.rollup_service import UNCATEGORIZED_KEY
+from app.services.periods import get_user_timezone, month_key
+from app.services.budget_evaluator import BudgetEvaluator
+from app.services.insights_cache import invalidate_on_commit
+from app.services.transaction_snapshot import transaction_snapshots
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+from itertools import chain
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from decimal import Decimal
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SpendingTracker:
+    """
+    Collects per-(user, category, month) deltas for transaction writes and applies
+    them to budgets and category rollups inside the caller's DB transaction.
+    Callers record every change, call apply() and then commit once.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._budget_deltas: Dict[Tuple[int, str, str], Decimal] = defaultdict(Decimal)
+        self._rollup_deltas: Dict[Tuple[int, str, str], List] = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+        self._timezones: Dict[int, ZoneInfo] = {}
+
+    def month_key(self, user_id: int, created_at: Optional[datetime]) -> str:
+        """Budget month ("YYYY-MM") a transaction belongs to, in the user's timezone"""
+        if user_id not in self._timezones:
+            self._timezones[user_id] = get_user_timezone(self.db, user_id)
+        return month_key(created_at, self._timezones[user_id])
+
+    @staticmethod
+    def debit_amount(amount) -> Decimal:
+        """Amount a transaction contributes to budget spending (debits only)"""
+        value = Decimal(str(amount or 0))
+        return -value if value < 0 else Decimal(0)
+
+    @staticmethod
+    def credit_amount(amount) -> Decimal:
+        """Amount a transaction contributes to income (credits only)"""
+        value = Decimal(str(amount or 0))
+        return value if value > 0 else Decimal(0)
+
+    def get_account_owner(self, account_id: int) -> Optional[int]:
+        """Get the user ID that owns an account"""
+        return self.db.query(Account.user_id).filter(Account.id == account_id).scalar()
+
+    def _add(self, user_id: int, category: Optional[str], created_at, amount, sign: int):
+        month = self.month_key(user_id, created_at)
+
+        debit = self.debit_amount(amount) * sign
+        if category and debit:
+            self._budget_deltas[(user_id, category, month)] += debit
+
+        rollup = self._rollup_deltas[(user_id, month, category or UNCATEGORIZED_KEY)]
+        rollup[0] += debit
+        rollup[1] += self.credit_amount(amount) * sign
+        rollup[2] += sign
+
+    def record_insert(self, txn, user_id: int):
+        """Record a newly inserted transaction (created_at must be loaded)"""
+        self._add(user_id, txn.category, txn.created_at, txn.amount, 1)
+        transaction_snapshots.append_on_commit(self.db, user_id, txn)
+
+    def record_delete(self, txn, user_id: int):
+        """Record a transaction that is being deleted"""
+        self._add(user_id, txn.category, txn.created_at, txn.amount, -1)
+        transaction_snapshots.invalidate_on_commit(self.db, user_id)
+
+    def record_update(self, txn, user_id: int, old_amount, old_category: Optional[str]):
+        """Record an amount change and/or recategorization of an existing transaction"""
+        self._add(user_id, old_category, txn.created_at, old_amount, -1)
+        self._add(user_id, txn.category, txn.created_at, txn.amount, 1)
+        transaction_snapshots.invalidate_on_commit(self.db, user_id)
+
+    def apply(self) -> int:
+        """
+        Apply all pending deltas: one UPDATE per affected budget and a single
+        rollup upsert. Budgets whose spending grew are handed to the
+        BudgetEvaluator. Does not commit; returns the number of budget rows touched
+        """
+        invalidate_on_commit(self.db, {key[0] for key in chain(self._budget_deltas, self._rollup_deltas)})
+        self._apply_rollups()
+
+        evaluator = BudgetEvaluator(self.db)
+        touched = 0
+        for (user_id, category, month), delta in self._budget_deltas.items():
+            if not delta:
+                continue
+            stmt = update(Budget).where(
+                Budget.user_id == user_id,
+                Budget.category == category,
+                Budget.month == month
+            ).values(
+                spent_amount=func.coalesce(Budget.spent_amount, 0) + delta
+            ).returning(Budget.id, Budget.spent_amount, Budget.limit_amount)
+
+            for budget_id, spent_amount, limit_amount in self.db.execute(stmt).all():
+                touched += 1
+                if delta > 0:
+                    evaluator.evaluate_values(budget_id, user_id, category, month, spent_amount, limit_amount)
+
+        if self._budget_deltas:
+            logger.info(f"Applied {len(self._budget_deltas)} budget spending deltas ({touched} budgets updated)")
+        self._budget_deltas.clear()
+        return touched
+
+    def _apply_rollups(self):
+        """Upsert all pending rollup deltas in one INSERT ... ON CONFLICT DO UPDATE"""
+        rows = [
+            {
+                "user_id": user_id,
+                "month": month,
+                "category": category,
+                "debit_total": debit,
+                "credit_total": credit,
+                "txn_count": count
+            }
+            for (user_id, month, category), (debit, credit, count) in self._rollup_deltas.items()
+            if debit or credit or count
+        ]
+        self._rollup_deltas.clear()
+        if not rows:
+            return
+
+        stmt = insert(CategoryMonthlyRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "month", "category"],
+            set_={
+                "debit_total": CategoryMonthlyRollup.debit_total + stmt.excluded.debit_total,
+                "credit_total": CategoryMonthlyRollup.credit_total + stmt.excluded.credit_total,
+                "txn_count": CategoryMonthlyRollup.txn_count + stmt.excluded.txn_count
+            }
+        )
+        self.db.execute(stmt)
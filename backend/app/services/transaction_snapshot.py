@@ -0,0 +1,276 @@
+"""
+Transaction Snapshots for In-Memory Columnar Analytics
+Keeps a compact NumPy copy (created_at, amount, category code, account id) of
+recently active users' transactions, loaded with one query and appended on
+write, so read-only analytics can slice it with vectorized filters instead
+of going back to Postgres. Memory is bounded with LRU eviction
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.models import Transaction
+from app.services.commit_hooks import after_commit
+from typing import Dict, List, Optional
+from collections import OrderedDict
+from datetime import datetime, timezone
+import threading
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionSnapshot:
+    """
+    Columnar arrays of one user's transactions, grown by doubling on append.
+    Rows below size never change once written, so a view() taken under the lock
+    stays consistent while other requests append
+    """
+
+    def __init__(self, user_id: int, ids, created_at, amounts, categories: List[Optional[str]], account_ids):
+        self.user_id = user_id
+        self.loaded_at = time.monotonic()
+        self.size = len(ids)
+        self._lock = threading.Lock()
+        self._max_id = int(np.max(ids)) if len(ids) else 0
+
+        self.category_names: List[Optional[str]] = []
+        self._category_codes: Dict[Optional[str], int] = {}
+        codes = [self.category_code(c, create=True) for c in categories]
+
+        capacity = max(self.size, 16)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._created_at = np.zeros(capacity, dtype=np.float64)  # epoch seconds
+        self._amounts = np.zeros(capacity, dtype=np.float64)
+        self._codes = np.zeros(capacity, dtype=np.int32)
+        self._account_ids = np.zeros(capacity, dtype=np.int64)
+        for column, values in ((self._ids, ids), (self._created_at, created_at), (self._amounts, amounts),
+                               (self._codes, codes), (self._account_ids, account_ids)):
+            column[:self.size] = values
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self.size]
+
+    @property
+    def created_at(self) -> np.ndarray:
+        return self._created_at[:self.size]
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self._amounts[:self.size]
+
+    @property
+    def category_codes(self) -> np.ndarray:
+        return self._codes[:self.size]
+
+    @property
+    def account_ids(self) -> np.ndarray:
+        return self._account_ids[:self.size]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self._ids, self._created_at, self._amounts, self._codes, self._account_ids))
+
+    def category_code(self, category: Optional[str], create: bool = False) -> int:
+        """Integer code of a category (-1 if unknown and not created)"""
+        code = self._category_codes.get(category)
+        if code is None and create:
+            code = self._category_codes[category] = len(self.category_names)
+            self.category_names.append(category)
+        return -1 if code is None else code
+
+    def view(self):
+        """Consistent (created_at, amounts, category_codes, category_names) of the rows so far"""
+        with self._lock:
+            n = self.size
+            return self._created_at[:n], self._amounts[:n], self._codes[:n], list(self.category_names)
+
+    def append(self, txn_id: int, created_at: float, amount: float, category: Optional[str], account_id: int) -> bool:
+        """Add a committed transaction; False if the snapshot already holds it (loaded after the commit)"""
+        with self._lock:
+            if txn_id <= self._max_id and np.any(self._ids[:self.size] == txn_id):
+                return False
+            self._append(txn_id, created_at, amount, category, account_id)
+            self._max_id = max(self._max_id, txn_id)
+            return True
+
+    def _append(self, txn_id: int, created_at: float, amount: float, category: Optional[str], account_id: int):
+        if self.size == len(self._ids):
+            for name in ("_ids", "_created_at", "_amounts", "_codes", "_account_ids"):
+                column = getattr(self, name)
+                grown = np.zeros(len(column) * 2, dtype=column.dtype)
+                grown[:self.size] = column
+                setattr(self, name, grown)
+        i = self.size
+        self._ids[i] = txn_id
+        self._created_at[i] = created_at
+        self._amounts[i] = amount
+        self._codes[i] = self.category_code(category, create=True)
+        self._account_ids[i] = account_id
+        self.size += 1
+
+    def bucket_totals(self, boundaries: np.ndarray, categories: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Income, expense and count per bucket for ascending epoch boundaries
+        (bucket i is [boundaries[i], boundaries[i + 1])), optionally per category.
+        Returns arrays shaped (buckets,) or (categories, buckets)
+        """
+        n_buckets = len(boundaries) - 1
+        created_at, amounts, codes, category_names = self.view()
+        mask = (created_at >= boundaries[0]) & (created_at < boundaries[-1])
+        buckets = np.searchsorted(boundaries, created_at[mask], side="right") - 1
+        amounts = amounts[mask]
+
+        if categories is None:
+            return {
+                "income": np.bincount(buckets, weights=np.where(amounts > 0, amounts, 0), minlength=n_buckets),
+                "expense": np.bincount(buckets, weights=np.where(amounts < 0, -amounts, 0), minlength=n_buckets),
+                "count": np.bincount(buckets, minlength=n_buckets)
+            }
+
+        codes_by_name = {name: code for code, name in enumerate(category_names)}
+        wanted = np.array([codes_by_name.get(c, -1) for c in categories], dtype=np.int32)
+        rows = np.full(len(category_names) + 1, -1, dtype=np.int64)
+        rows[wanted[wanted >= 0]] = np.flatnonzero(wanted >= 0)
+        category_rows = rows[codes[mask]]
+        keep = category_rows >= 0
+
+        expense = np.zeros((len(categories), n_buckets))
+        debits = np.where(amounts < 0, -amounts, 0)
+        np.add.at(expense, (category_rows[keep], buckets[keep]), debits[keep])
+        return {"expense": expense}
+
+
+class SnapshotStore:
+    """LRU of per-user snapshots with a total memory budget; thread-safe"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, max_user_bytes: int = 16 * 1024 * 1024,
+                 ttl_seconds: float = 300, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.max_user_bytes = max_user_bytes
+        # Bounds staleness from writes made by other worker processes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._snapshots: "OrderedDict[int, TransactionSnapshot]" = OrderedDict()
+        # Users whose snapshot exceeded max_user_bytes -> when that was seen
+        self._oversize: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, **settings):
+        for name, value in settings.items():
+            setattr(self, name, value)
+        if not self.enabled:
+            self.clear()
+
+    def get(self, db: Session, user_id: int) -> Optional[TransactionSnapshot]:
+        """Snapshot of a user's transactions, loading it on first use; None when disabled or too large"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None and time.monotonic() - snapshot.loaded_at <= self.ttl_seconds:
+                self._snapshots.move_to_end(user_id)
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            # Don't reload a history known to be too large until the TTL passes
+            seen = self._oversize.get(user_id)
+            if seen is not None and time.monotonic() - seen <= self.ttl_seconds:
+                return None
+
+        snapshot = self._load(db, user_id)
+        if snapshot.nbytes > self.max_user_bytes:
+            logger.info(f"Transaction snapshot for user {user_id} exceeds {self.max_user_bytes} bytes, not cached")
+            with self._lock:
+                self._oversize[user_id] = time.monotonic()
+            return None
+
+        with self._lock:
+            self._oversize.pop(user_id, None)
+            self._snapshots[user_id] = snapshot
+            self._evict()
+        return snapshot
+
+    def _load(self, db: Session, user_id: int) -> TransactionSnapshot:
+        rows = db.query(
+            Transaction.id,
+            func.extract('epoch', Transaction.created_at),
+            Transaction.amount,
+            Transaction.category,
+            Transaction.account_id
+        ).filter(Transaction.user_id == user_id).order_by(Transaction.created_at).all()
+
+        columns = list(zip(*rows)) if rows else [()] * 5
+        return TransactionSnapshot(
+            user_id,
+            ids=np.array(columns[0], dtype=np.int64),
+            created_at=np.array(columns[1], dtype=np.float64),
+            amounts=np.array(columns[2], dtype=np.float64),
+            categories=list(columns[3]),
+            account_ids=np.array(columns[4], dtype=np.int64)
+        )
+
+    def _evict(self):
+        total = sum(s.nbytes for s in self._snapshots.values())
+        while total > self.max_bytes and len(self._snapshots) > 1:
+            _, evicted = self._snapshots.popitem(last=False)
+            total -= evicted.nbytes
+            self.evictions += 1
+
+    def append_on_commit(self, db: Session, user_id: int, txn):
+        """Append a newly inserted transaction to the user's snapshot once it commits"""
+        if not self.enabled:
+            return
+        created_at = txn.created_at or datetime.now(timezone.utc)
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        values = (txn.id, created_at.timestamp(), float(txn.amount or 0), txn.category, txn.account_id)
+
+        def append():
+            with self._lock:
+                snapshot = self._snapshots.get(user_id)
+                if snapshot is not None:
+                    snapshot.append(*values)
+                    self._evict()
+
+        after_commit(db, append)
+
+    def invalidate_on_commit(self, db: Session, user_id: int):
+        """Drop a user's snapshot once an update or delete of their transactions commits"""
+        if self.enabled:
+            after_commit(db, lambda: self.invalidate(user_id))
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._snapshots.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+            self._oversize.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            per_user = {user_id: s.nbytes for user_id, s in self._snapshots.items()}
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "users": len(per_user),
+                "bytes": sum(per_user.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "per_user_bytes": per_user
+            }
+
+
+# Shared store for the API process (configured in app.main)
+transaction_snapshots = SnapshotStore()
@@ -0,0 +1,36 @@
+"""
+Backfill daily account balance and net worth snapshots from transaction history
+Adds a running sum of daily transaction totals to each account's balance before
+the first day; safe to re-run (rows are upserted)
+
+Usage: python backfill_balance_snapshots.py [--days N] [--chunk-users N]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import date, timedelta
+from app.database import SessionLocal
+from app.services.balance_snapshots import BalanceSnapshotService
+
+def backfill(days, chunk_users):
+    start = date.today() - timedelta(days=days - 1)
+    db = SessionLocal()
+    try:
+        result = BalanceSnapshotService(db).backfill(start, chunk_size=chunk_users)
+    finally:
+        db.close()
+
+    print(f"✅ Backfilled snapshots since {start}: {result['net_worth_rows']} net worth rows "
+          f"({result['chunks']} chunks, {result['elapsed_ms']}ms)")
+    return result
+
+def _option(name, default):
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+if __name__ == "__main__":
+    backfill(
+        days=_option("--days", 365),
+        chunk_users=_option("--chunk-users", BalanceSnapshotService.CHUNK_SIZE)
+    )
@@ -0,0 +1,52 @@
+"""
+Backfill transactions.user_id (denormalized from accounts.user_id) in id-range batches
+Each batch is its own short UPDATE + commit, so the table is never locked as a whole
+and the script can be stopped and re-run at any point. Run after migrate_schema.py.
+
+Usage: python backfill_transaction_users.py [--batch-size N]
+"""
+import sys
+sys.path.insert(0, '.')
+
+import time
+from sqlalchemy import text
+from app.database import SessionLocal
+
+BATCH_SIZE = 5000
+
+BACKFILL_BATCH_SQL = text("""
+    UPDATE transactions AS t
+    SET user_id = a.user_id
+    FROM accounts AS a
+    WHERE a.id = t.account_id
+      AND t.id >= :start_id AND t.id < :end_id
+      AND t.user_id IS DISTINCT FROM a.user_id
+""")
+
+def backfill(batch_size=BATCH_SIZE):
+    db = SessionLocal()
+    started = time.perf_counter()
+    updated = 0
+    batches = 0
+    try:
+        low, high = db.execute(text("SELECT min(id), max(id) FROM transactions")).one()
+        if low is not None:
+            for start_id in range(low, high + 1, batch_size):
+                result = db.execute(BACKFILL_BATCH_SQL, {"start_id": start_id, "end_id": start_id + batch_size})
+                db.commit()
+                updated += result.rowcount
+                batches += 1
+    finally:
+        db.close()
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    print(f"✅ Backfilled user_id on {updated} transactions ({batches} batches, {elapsed_ms}ms)")
+    return updated
+
+def _option(name, default):
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+if __name__ == "__main__":
+    backfill(batch_size=_option("--batch-size", BATCH_SIZE))
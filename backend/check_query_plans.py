@@ -0,0 +1,126 @@
+"""
+EXPLAIN-based regression check for month-filtered queries
+Fails (exit code 1) if any checked query plans a sequential scan on transactions,
+budgets or category_monthly_rollups
+
+Covers the BudgetService spending queries and every query issued by the month-filtered
+paths of the insights and budgets routes; those are captured while the services run
+and each one is EXPLAINed with its bound parameters. Sequential scans are disabled for
+the check so tiny tables still show whether an index *can* serve the query; a
+non-sargable filter still ends up as Seq Scan.
+
+Usage: python check_query_plans.py [user_id] [YYYY-MM]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from contextlib import contextmanager
+from sqlalchemy import event, text
+from app.database import SessionLocal
+from app.models import Budget
+from app.services.budget_service import BudgetService
+from app.services.budget_forecast import BudgetForecaster
+from app.services.rollup_service import RollupService
+from app.services.periods import current_month, shift_month
+
+# Tables that month filters must reach through an index
+WATCHED_TABLES = ("transactions", "budgets", "category_monthly_rollups")
+
+def find_seq_scans(plan, tables=WATCHED_TABLES):
+    """Collect Seq Scan nodes on the given tables from an EXPLAIN (FORMAT JSON) plan"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in tables:
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child, tables))
+    return found
+
+def explain(db, statement, params=None):
+    """Run EXPLAIN (FORMAT JSON) for a driver-level statement and return the root plan node"""
+    result = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", params or {})
+    return result.scalar()[0]["Plan"]
+
+def explain_query(db, query):
+    """EXPLAIN an ORM query"""
+    compiled = query.statement.compile(dialect=db.bind.dialect, compile_kwargs={"render_postcompile": True})
+    return explain(db, str(compiled), compiled.params)
+
+@contextmanager
+def captured_selects(db):
+    """Record the (statement, parameters) of every SELECT the session runs inside the block"""
+    statements = []
+    connection = db.connection()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+def assert_index_only(name, plan):
+    """Raise AssertionError if the plan reads a watched table sequentially"""
+    seq_scans = find_seq_scans(plan)
+    if seq_scans:
+        tables = ", ".join(sorted({node["Relation Name"] for node in seq_scans}))
+        raise AssertionError(f"{name}: sequential scan on {tables}")
+
+def route_paths(db, user_id, month):
+    """Service calls made by the month-filtered insights and budgets routes"""
+    rollups = RollupService(db)
+    budgets = BudgetService(db)
+    return {
+        "insights spending/income by category": lambda: rollups.get_category_totals(user_id, month),
+        "insights monthly summary": lambda: rollups.get_totals(user_id, month),
+        "insights category trends": lambda: rollups.get_category_trends(user_id, ["Food & Dining"], 6, month),
+        "insights dashboard overview": lambda: rollups.get_month_overview(user_id, month, shift_month(month, -1)),
+        "insights dashboard budgets": lambda: budgets.get_all_budgets_with_progress(user_id, month),
+        "budgets list": lambda: db.query(Budget).filter(Budget.user_id == user_id, Budget.month == month).all(),
+        "budgets forecast": lambda: BudgetForecaster(db).forecast(user_id, month),
+        "budgets create (spending seed)": lambda: budgets.calculate_month_spending(user_id, "Food & Dining", month),
+    }
+
+def check(user_id=1, month=None):
+    """Return the failure messages (empty when every plan uses an index)"""
+    db = SessionLocal()
+    failures = []
+    try:
+        db.execute(text("SET enable_seqscan = off"))
+        service = BudgetService(db)
+        month = month or current_month()
+
+        plans = {
+            "budget spent amount": explain_query(db, service.spent_amount_query(user_id, "Food & Dining", month)),
+            "category spending": explain_query(db, service.category_spending_query(user_id, month)),
+        }
+        for name, run in route_paths(db, user_id, month).items():
+            with captured_selects(db) as statements:
+                run()
+            if not statements:
+                failures.append(f"{name}: no query captured")
+            for index, (statement, params) in enumerate(statements, 1):
+                plans[f"{name} #{index}"] = explain(db, statement, params)
+
+        for name, plan in plans.items():
+            try:
+                assert_index_only(name, plan)
+                print(f"✅ {name}: index scan")
+            except AssertionError as e:
+                failures.append(str(e))
+                print(f"❌ {e}")
+    finally:
+        db.rollback()
+        db.close()
+
+    return failures
+
+if __name__ == "__main__":
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    month = sys.argv[2] if len(sys.argv) > 2 else None
+    failures = check(user_id, month)
+    if failures:
+        print(f"{len(failures)} query plan check(s) failed")
+        sys.exit(1)
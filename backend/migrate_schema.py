@@ -0,0 +1,103 @@
+"""
+Idempotent schema migration for tables, columns and indexes added after the initial setup
+Safe to run repeatedly; run it after pulling changes that touch app/models
+
+Usage: python migrate_schema.py
+"""
+import sys
+sys.path.insert(0, '.')
+
+from sqlalchemy import text
+from app.database import engine, Base
+import app.models  # noqa: F401 - registers every model on Base.metadata
+
+# Changes to tables that already exist (create_all only creates missing tables)
+STATEMENTS = [
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_budgets_user_month ON budgets (user_id, month)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_account_created "
+    "ON transactions (account_id, created_at) INCLUDE (amount, category)",
+    "ALTER TABLE alerts ADD COLUMN IF NOT EXISTS source_type VARCHAR",
+    "ALTER TABLE alerts ADD COLUMN IF NOT EXISTS source_id INTEGER",
+    "ALTER TABLE alerts ADD COLUMN IF NOT EXISTS period VARCHAR",
+    "ALTER TABLE alerts ADD COLUMN IF NOT EXISTS threshold INTEGER",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_alerts_source ON alerts (source_type, source_id, period, threshold) "
+    "WHERE source_type IS NOT NULL",
+    # Give legacy budget alerts (matched by exact title, not LIKE) their structured identity
+    """
+    UPDATE alerts AS a
+    SET source_type = 'budget', source_id = m.budget_id, period = m.month, threshold = 100
+    FROM (
+        SELECT DISTINCT ON (b.id) a.id AS alert_id, b.id AS budget_id, b.month
+        FROM alerts AS a
+        JOIN budgets AS b
+          ON b.user_id = a.user_id
+         AND a.title = 'Budget Exceeded: ' || b.category
+         AND b.month = to_char(a.created_at, 'YYYY-MM')
+        WHERE a.alert_type = 'budget_exceeded'
+          AND a.source_type IS NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM alerts AS x
+              WHERE x.source_type = 'budget' AND x.source_id = b.id
+                AND x.period = b.month AND x.threshold = 100
+          )
+        ORDER BY b.id, a.created_at
+    ) AS m
+    WHERE a.id = m.alert_id
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_alerts_user_created ON alerts (user_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_user_unread ON alerts (user_id, created_at, id) WHERE is_read = false",
+    "ALTER TABLE alerts ADD COLUMN IF NOT EXISTS repeat_count INTEGER NOT NULL DEFAULT 1",
+    # Inbox cursors and retention need created_at; legacy rows without one count as new
+    "UPDATE alerts SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL",
+    "ALTER TABLE alerts ALTER COLUMN created_at SET DEFAULT (now() AT TIME ZONE 'utc')",
+    "ALTER TABLE alerts ALTER COLUMN created_at SET NOT NULL",
+    # Denormalized owner on transactions. Per-user reads filter on it, so rows that
+    # predate the column show up nowhere until backfill_transaction_users.py has run
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users (id)",
+    # Fill it from accounts.user_id for every insert (raw SQL, other apps) and account move
+    """
+    CREATE OR REPLACE FUNCTION transactions_set_user_id() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.user_id IS NULL OR TG_OP = 'UPDATE' THEN
+            SELECT a.user_id INTO NEW.user_id FROM accounts AS a WHERE a.id = NEW.account_id;
+        END IF;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_transactions_set_user_id ON transactions",
+    "CREATE TRIGGER trg_transactions_set_user_id BEFORE INSERT OR UPDATE OF account_id ON transactions "
+    "FOR EACH ROW EXECUTE PROCEDURE transactions_set_user_id()",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_created "
+    "ON transactions (user_id, created_at) INCLUDE (amount, category)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_category_created "
+    "ON transactions (user_id, category, created_at) INCLUDE (amount)",
+    "CREATE INDEX IF NOT EXISTS ix_bills_unpaid_due ON bills (due_date) WHERE is_paid = false",
+    "CREATE INDEX IF NOT EXISTS ix_bills_user_due ON bills (user_id, due_date)",
+    # Seed unread counters for users whose alerts predate alert_counters
+    """
+    INSERT INTO alert_counters (user_id, unread_count)
+    SELECT user_id, count(*) FILTER (WHERE is_read = false)
+    FROM alerts
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id
+    ON CONFLICT (user_id) DO NOTHING
+    """,
+]
+
+def migrate():
+    # New tables (with their indexes)
+    Base.metadata.create_all(bind=engine)
+    print("✅ Created missing tables")
+
+    with engine.begin() as conn:
+        for statement in STATEMENTS:
+            conn.execute(text(statement))
+            print(f"  {' '.join(statement.split())[:100]}")
+
+    print(f"✅ Applied {len(STATEMENTS)} schema statements")
+    print("  Run backfill_transaction_users.py once so existing transactions get their user_id")
+
+if __name__ == "__main__":
+    migrate()
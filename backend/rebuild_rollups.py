@@ -0,0 +1,24 @@
+"""
+Rebuild the per-user monthly category rollup table from raw transactions
+Run once after migrate_schema.py creates the table, or whenever the rollups need repairing
+
+Usage: python rebuild_rollups.py [user_id]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.rollup_service import RollupService
+
+def rebuild(user_id=None):
+    db = SessionLocal()
+    try:
+        rows = RollupService(db).rebuild(user_id=user_id)
+    finally:
+        db.close()
+
+    scope = f"user {user_id}" if user_id is not None else "all users"
+    print(f"✅ Rebuilt {rows} category rollups for {scope}")
+
+if __name__ == "__main__":
+    rebuild(int(sys.argv[1]) if len(sys.argv) > 1 else None)
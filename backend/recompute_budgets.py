@@ -0,0 +1,32 @@
+"""
+Nightly set-based budget recomputation across all users
+Refreshes budgets.spent_amount for a month with UPDATE ... FROM (aggregate)
+
+Usage: python recompute_budgets.py [YYYY-MM] [--chunk-size N]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.budget_service import BudgetService
+from app.services.periods import current_month
+
+def recompute(month=None, chunk_size=None):
+    db = SessionLocal()
+    try:
+        stats = BudgetService(db).recompute_month(month or current_month(), chunk_size=chunk_size)
+    finally:
+        db.close()
+
+    print(f"✅ {stats['month']}: {stats['rows_changed']} budgets changed "
+          f"in {stats['elapsed_ms']}ms ({stats['chunks']} chunks)")
+    return stats
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    chunk_size = None
+    if "--chunk-size" in args:
+        index = args.index("--chunk-size")
+        chunk_size = int(args[index + 1])
+        del args[index:index + 2]
+    recompute(month=args[0] if args else None, chunk_size=chunk_size)
@@ -0,0 +1,30 @@
+"""
+Periodic reconciler for the write-maintained unread alert counters
+Compares alert_counters with the alerts table and repairs any drift
+
+Usage: python reconcile_alert_counters.py [user_id] [--check]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.alert_service import AlertService
+
+def reconcile(user_id=None, fix=True):
+    db = SessionLocal()
+    try:
+        drift = AlertService(db).reconcile_unread_counts(user_id=user_id, fix=fix)
+    finally:
+        db.close()
+
+    for item in drift:
+        print(f"  User {item['user_id']}: stored {item['stored']}, actual {item['actual']}")
+
+    action = "Corrected" if fix else "Found"
+    print(f"✅ {action} {len(drift)} drifted unread counters")
+    return drift
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    drift = reconcile(user_id=int(args[0]) if args else None, fix="--check" not in sys.argv)
+    sys.exit(1 if drift and "--check" in sys.argv else 0)
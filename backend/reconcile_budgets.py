@@ -0,0 +1,31 @@
+"""
+Periodic reconciler for incrementally maintained budget spending
+Compares budgets.spent_amount with transaction totals and repairs any drift
+
+Usage: python reconcile_budgets.py [YYYY-MM] [--check]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.budget_service import BudgetService
+
+def reconcile(month=None, fix=True):
+    db = SessionLocal()
+    try:
+        drift = BudgetService(db).reconcile_spent_amounts(month=month, fix=fix)
+    finally:
+        db.close()
+
+    for item in drift:
+        print(f"  Budget {item['budget_id']} (user {item['user_id']}, {item['category']}, {item['month']}): "
+              f"stored ₹{item['stored']:.2f}, actual ₹{item['actual']:.2f}")
+
+    action = "Corrected" if fix else "Found"
+    print(f"✅ {action} {len(drift)} drifted budgets")
+    return drift
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    drift = reconcile(month=args[0] if args else None, fix="--check" not in sys.argv)
+    sys.exit(1 if drift and "--check" in sys.argv else 0)
@@ -0,0 +1,45 @@
+"""
+Periodic alert retention job
+Compacts repeated read alerts into digests, then archives (or deletes)
+read alerts older than the retention window
+
+Usage: python run_alert_retention.py [--days N] [--compact-days N] [--batch-size N] [--delete]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.alert_retention import AlertRetentionService
+
+def run(days, compact_days, batch_size, archive=True):
+    db = SessionLocal()
+    try:
+        result = AlertRetentionService(db).run(
+            retention_days=days,
+            compact_after_days=compact_days,
+            archive=archive,
+            batch_size=batch_size
+        )
+    finally:
+        db.close()
+
+    compaction = result["compaction"]
+    retention = result["retention"]
+    action = "Archived" if archive else "Deleted"
+    print(f"✅ Compacted {compaction['removed']} repeated alerts into {compaction['digests']} digests")
+    print(f"✅ {action} {retention['archived' if archive else 'deleted']} read alerts older than {days} days "
+          f"({retention['batches']} batches, {retention['elapsed_ms']}ms)")
+    return result
+
+def _option(name, default):
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+if __name__ == "__main__":
+    run(
+        days=_option("--days", AlertRetentionService.RETENTION_DAYS),
+        compact_days=_option("--compact-days", AlertRetentionService.COMPACT_AFTER_DAYS),
+        batch_size=_option("--batch-size", AlertRetentionService.BATCH_SIZE),
+        archive="--delete" not in sys.argv
+    )
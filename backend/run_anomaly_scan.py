@@ -0,0 +1,47 @@
+"""
+Nightly spending anomaly scan
+Flags debits since the last run that are far above the user's usual spend in
+their category, within a fixed time budget, and records the run (window and
+resume cursor) in job_runs; the next run continues where this one stopped
+
+Usage: python run_anomaly_scan.py [--budget-seconds N] [--chunk-users N] [--start-user N]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.services.anomaly_detector import AnomalyDetector
+from app.services.scheduler import JobScheduler
+
+def _option(name, default):
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+def scan(time_budget_seconds, chunk_users, start_user_id=None):
+    scheduler = JobScheduler()
+    scheduler.add_job(
+        AnomalyDetector.JOB_NAME, 0,
+        lambda db: AnomalyDetector(db).run(
+            chunk_users=chunk_users,
+            time_budget_seconds=time_budget_seconds,
+            start_user_id=start_user_id
+        ),
+        count_key="alerts_created"
+    )
+    result = scheduler.run_job(scheduler.jobs[0])
+    if result is None:
+        print("⚠️  Anomaly scan is already running elsewhere")
+        return None
+
+    print(f"✅ Scanned {result.get('scanned', 0)} recent debits, found {result.get('anomalies', 0)} anomalies, "
+          f"created {result.get('alerts_created', 0)} alerts in {result.get('elapsed_ms')}ms")
+    if result.get("next_user_id"):
+        print(f"  Time budget reached at user {result['next_user_id']}; the next run resumes there")
+    return result
+
+if __name__ == "__main__":
+    scan(
+        time_budget_seconds=_option("--budget-seconds", AnomalyDetector.TIME_BUDGET_SECONDS),
+        chunk_users=_option("--chunk-users", AnomalyDetector.CHUNK_USERS),
+        start_user_id=_option("--start-user", None)
+    )
@@ -0,0 +1,36 @@
+"""
+Bill reminder run
+Raises one reminder alert per unpaid bill due within the reminder window (once
+per due date), across all users in one statement, and records the run in job_runs
+
+Usage: python run_bill_reminders.py [--days N]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.services.bill_reminders import BillReminderService
+from app.services.scheduler import JobScheduler
+
+def _option(name, default):
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+def remind(days_ahead):
+    scheduler = JobScheduler()
+    scheduler.add_job(
+        "bill_reminders", 0,
+        lambda db: BillReminderService(db).run(days_ahead=days_ahead),
+        count_key="alerts_created"
+    )
+    result = scheduler.run_job(scheduler.jobs[0])
+    if result is None:
+        print("⚠️  Bill reminders are already running elsewhere")
+        return None
+
+    print(f"✅ Created {result.get('alerts_created', 0)} bill reminders for bills due in the next {days_ahead} days "
+          f"in {result.get('elapsed_ms')}ms")
+    return result
+
+if __name__ == "__main__":
+    remind(days_ahead=_option("--days", BillReminderService.REMINDER_DAYS))
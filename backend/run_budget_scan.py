@@ -0,0 +1,37 @@
+"""
+Global budget breach scan
+Raises every missing budget threshold alert across all users with one
+set-based statement per chunk of users, and records the run in job_runs
+
+Usage: python run_budget_scan.py [YYYY-MM ...] [--chunk-size N]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.services.budget_evaluator import BudgetEvaluator
+from app.services.scheduler import JobScheduler
+
+def scan(months=None, chunk_size=None):
+    scheduler = JobScheduler()
+    scheduler.add_job(
+        "budget_breach_scan", 0,
+        lambda db: BudgetEvaluator(db).scan_all(months=months, chunk_size=chunk_size),
+        count_key="alerts_created"
+    )
+    result = scheduler.run_job(scheduler.jobs[0])
+    if result is None:
+        print("⚠️  Budget breach scan is already running elsewhere")
+        return None
+
+    print(f"✅ Created {result.get('alerts_created', 0)} alerts for {result.get('months')} "
+          f"in {result.get('elapsed_ms')}ms ({result.get('chunks')} chunks)")
+    return result
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    chunk_size = None
+    if "--chunk-size" in args:
+        index = args.index("--chunk-size")
+        chunk_size = int(args[index + 1])
+        del args[index:index + 2]
+    scan(months=args or None, chunk_size=chunk_size)
@@ -0,0 +1,46 @@
+"""
+Recurring payment detection
+Rescores merchants with debits newer than the last successful run, proposes
+recurring ones as bills (or creates them with --auto-create), and records the
+run and its transaction watermark in job_runs
+
+Usage: python run_recurring_detection.py [--since N] [--chunk-users N] [--auto-create]
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.services.recurring_detector import RecurringDetector
+from app.services.scheduler import JobScheduler
+
+def _option(name, default):
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+def detect(since_transaction_id=None, chunk_users=RecurringDetector.CHUNK_USERS, auto_create=False):
+    scheduler = JobScheduler()
+    scheduler.add_job(
+        RecurringDetector.JOB_NAME, 0,
+        lambda db: RecurringDetector(db).run(
+            since_transaction_id=since_transaction_id,
+            auto_create=auto_create,
+            chunk_users=chunk_users
+        ),
+        count_key="merchants"
+    )
+    result = scheduler.run_job(scheduler.jobs[0])
+    if result is None:
+        print("⚠️  Recurring detection is already running elsewhere")
+        return None
+
+    print(f"✅ Rescored {result.get('merchants', 0)} merchants for {result.get('users', 0)} users: "
+          f"{result.get('recurring', 0)} recurring, {result.get('bills_created', 0)} bills created "
+          f"in {result.get('elapsed_ms')}ms (watermark {result.get('watermark')})")
+    return result
+
+if __name__ == "__main__":
+    detect(
+        since_transaction_id=_option("--since", None),
+        chunk_users=_option("--chunk-users", RecurringDetector.CHUNK_USERS),
+        auto_create="--auto-create" in sys.argv
+    )
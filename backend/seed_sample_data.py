@@ -6,7 +6,10 @@ import sys
 sys.path.insert(0, '.')
 
 from app.database import SessionLocal
-from app.models import Transaction, Budget, CategoryRule, Alert
+from app.models import Transaction, Account, Budget, CategoryRule, Alert
+from app.services.budget_service import BudgetService
+from app.services.rollup_service import RollupService
+from app.services.alert_service import AlertService
 from datetime import datetime, timedelta
 import random
 
@@ -127,11 +130,13 @@ def seed_transactions():
     db.query(Transaction).filter(Transaction.account_id.in_([12, 13])).delete()
     
     # Add new transactions
+    owners = dict(db.query(Account.id, Account.user_id).filter(Account.id.in_([12, 13])).all())
     base_date = datetime.now()
     for txn_data in transactions_data:
         days_ago = txn_data.get("days_ago", 0)
         txn = Transaction(
             account_id=txn_data["account_id"],
+            user_id=owners.get(txn_data["account_id"]),
             description=txn_data["description"],
             amount=txn_data["amount"],
             category=txn_data["category"],
@@ -194,6 +199,16 @@ def seed_budgets():
     print(f"✅ Added {len(budgets_data)} budgets")
     db.close()
 
+def refresh_aggregates():
+    db = SessionLocal()
+    
+    # Seeded rows bypass the transaction routes, so rebuild derived totals
+    rollups = RollupService(db).rebuild(user_id=1)
+    drift = BudgetService(db).reconcile_spent_amounts(user_id=1)
+    
+    print(f"✅ Rebuilt {rollups} category rollups, refreshed {len(drift)} budget totals")
+    db.close()
+
 def seed_category_rules():
     db = SessionLocal()
     
@@ -306,6 +321,8 @@ def seed_alerts():
         db.add(alert)
     
     db.commit()
+    # Seeded alerts bypass AlertService, so resync the unread badge counter
+    AlertService(db).reconcile_unread_counts(user_id=1)
     print(f"✅ Added {len(alerts_data)} alerts")
     db.close()
 
@@ -315,6 +332,7 @@ if __name__ == "__main__":
     seed_category_rules()
     seed_transactions()
     seed_budgets()
+    refresh_aggregates()
     seed_alerts()
     print("-" * 50)
     print("✅ Sample data seeding completed!")
@@ -13,7 +13,7 @@ function Accounts() {
   }, []);
 
   const fetchAccounts = () => {
-    fetch("http://127.0.0.1:8000/accounts")
+    fetch("http://127.0.0.1:8000/accounts/summary")
       .then((res) => res.json())
       .then((data) => setAccounts(data))
       .catch((err) => console.error(err));
@@ -73,6 +73,9 @@ function Accounts() {
               <th className="py-2">Bank</th>
               <th>Type</th>
               <th>Balance</th>
+              <th>Transactions</th>
+              <th>Last Activity</th>
+              <th>This Month In / Out</th>
             </tr>
           </thead>
           <tbody>
@@ -83,6 +86,17 @@ function Accounts() {
                 <td className="font-semibold text-blue-600">
                   ₹{acc.balance}
                 </td>
+                <td>{acc.txn_count}</td>
+                <td>
+                  {acc.last_activity
+                    ? new Date(acc.last_activity).toLocaleDateString()
+                    : "—"}
+                </td>
+                <td>
+                  <span className="text-green-600">+₹{acc.month_in}</span>
+                  {" / "}
+                  <span className="text-red-600">-₹{acc.month_out}</span>
+                </td>
               </tr>
             ))}
           </tbody>
@@ -27,7 +27,7 @@ const COLORS = [
 ];
 
 function Analytics() {
-  const [transactions, setTransactions] = useState([]);
+  const [summary, setSummary] = useState({ total_income: 0, total_expense: 0 });
   const [categoryData, setCategoryData] = useState([]);
   const [chartType, setChartType] = useState("pie");
   const [selectedMonth, setSelectedMonth] = useState(new Date().toISOString().slice(0, 7));
@@ -43,28 +43,17 @@ function Analytics() {
     const userId = 1;
 
     try {
-      // Fetch transactions
-      const txnResponse = await fetch(
-        `http://127.0.0.1:8000/transactions?user_id=${userId}`,
+      // Summary and category splits for the month in one request
+      const dashboardResponse = await fetch(
+        `http://127.0.0.1:8000/insights/dashboard?user_id=${userId}&month=${selectedMonth}`,
         {
           headers: { Authorization: `Bearer ${token}` },
         }
       );
-      if (txnResponse.ok) {
-        const txnData = await txnResponse.json();
-        setTransactions(txnData);
-      }
-
-      // Fetch spending by category with month filter
-      const categoryResponse = await fetch(
-        `http://127.0.0.1:8000/insights/spending-by-category?user_id=${userId}&month=${selectedMonth}`,
-        {
-          headers: { Authorization: `Bearer ${token}` },
-        }
-      );
-      if (categoryResponse.ok) {
-        const catData = await categoryResponse.json();
-        const formattedData = catData.map((item, index) => ({
+      if (dashboardResponse.ok) {
+        const dashboard = await dashboardResponse.json();
+        setSummary(dashboard.summary);
+        const formattedData = dashboard.spending_by_category.map((item, index) => ({
           ...item,
           color: COLORS[index % COLORS.length],
         }));
@@ -78,10 +67,8 @@ function Analytics() {
   };
 
   // Calculate totals
-  const totalExpense = categoryData.reduce((sum, item) => sum + item.amount, 0);
-  const totalIncome = transactions
-    .filter((t) => t.amount > 0)
-    .reduce((sum, t) => sum + t.amount, 0);
+  const totalExpense = summary.total_expense;
+  const totalIncome = summary.total_income;
 
   const formatAmount = (amount) => {
     return new Intl.NumberFormat("en-IN", {
@@ -35,9 +35,17 @@ function Dashboard() {
     };
 
     fetchUnreadCount();
-    // Refresh every 30 seconds
-    const interval = setInterval(fetchUnreadCount, 30000);
-    return () => clearInterval(interval);
+
+    // New alerts are pushed over SSE instead of polling; the browser
+    // reconnects on its own and resumes from the last alert id it saw
+    const stream = new EventSource("http://127.0.0.1:8000/alerts/stream?user_id=1");
+    stream.addEventListener("alert", (event) => {
+      const alert = JSON.parse(event.data);
+      if (!alert.is_read) {
+        setUnreadCount((count) => count + 1);
+      }
+    });
+    return () => stream.close();
   }, []);
 
   const handleLogout = () => {
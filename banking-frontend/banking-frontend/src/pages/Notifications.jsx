@@ -3,22 +3,30 @@ import React, { useState, useEffect } from "react";
 function Notifications() {
   const [alerts, setAlerts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [unreadCount, setUnreadCount] = useState(0);
 
   useEffect(() => {
     fetchAlerts();
+    fetchUnreadCount();
   }, []);
 
-  const fetchAlerts = async () => {
+  // Alerts are paginated; pass the previous page's cursor to load older ones
+  const fetchAlerts = async (cursor = null) => {
     const token = localStorage.getItem("token");
+    const url = cursor
+      ? `http://127.0.0.1:8000/alerts/?user_id=1&cursor=${encodeURIComponent(cursor)}`
+      : "http://127.0.0.1:8000/alerts/?user_id=1";
     try {
-      const response = await fetch("http://127.0.0.1:8000/alerts/?user_id=1", {
+      const response = await fetch(url, {
         headers: {
           Authorization: `Bearer ${token}`,
         },
       });
       if (response.ok) {
         const data = await response.json();
-        setAlerts(data);
+        setAlerts((current) => (cursor ? [...current, ...data] : data));
+        setNextCursor(response.headers.get("X-Next-Cursor"));
       }
     } catch (err) {
       console.error("Failed to fetch alerts:", err);
@@ -27,6 +35,23 @@ function Notifications() {
     }
   };
 
+  const fetchUnreadCount = async () => {
+    const token = localStorage.getItem("token");
+    try {
+      const response = await fetch("http://127.0.0.1:8000/alerts/unread-count?user_id=1", {
+        headers: {
+          Authorization: `Bearer ${token}`,
+        },
+      });
+      if (response.ok) {
+        const data = await response.json();
+        setUnreadCount(data.unread_count || 0);
+      }
+    } catch (err) {
+      console.error("Failed to fetch unread count:", err);
+    }
+  };
+
   const handleMarkAsRead = async (alertId) => {
     const token = localStorage.getItem("token");
     try {
@@ -43,6 +68,7 @@ function Notifications() {
         setAlerts(alerts.map(alert => 
           alert.id === alertId ? { ...alert, is_read: true } : alert
         ));
+        fetchUnreadCount();
       }
     } catch (err) {
       console.error("Failed to mark alert as read:", err);
@@ -60,6 +86,7 @@ function Notifications() {
       });
       if (response.ok) {
         setAlerts(alerts.map(alert => ({ ...alert, is_read: true })));
+        setUnreadCount(0);
       }
     } catch (err) {
       console.error("Failed to mark all alerts as read:", err);
@@ -80,14 +107,13 @@ function Notifications() {
       );
       if (response.ok) {
         setAlerts(alerts.filter(alert => alert.id !== alertId));
+        fetchUnreadCount();
       }
     } catch (err) {
       console.error("Failed to delete alert:", err);
     }
   };
 
-  const unreadCount = alerts.filter(a => !a.is_read).length;
-
   const formatDate = (dateString) => {
     if (!dateString) return "";
     const date = new Date(dateString);
@@ -167,6 +193,11 @@ function Notifications() {
                       }`}>
                         {alert.title}
                       </h3>
+                      {alert.repeat_count > 1 && (
+                        <span className="px-2 py-0.5 bg-gray-200 text-gray-600 text-xs rounded-full">
+                          ×{alert.repeat_count}
+                        </span>
+                      )}
                       {!alert.is_read && (
                         <span className="px-2 py-0.5 bg-blue-500 text-white text-xs rounded-full">
                           New
@@ -201,6 +232,14 @@ function Notifications() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <button
+                onClick={() => fetchAlerts(nextCursor)}
+                className="w-full py-2 text-blue-600 hover:text-blue-800 text-sm font-medium"
+              >
+                Load older notifications
+              </button>
+            )}
           </div>
         )}
       </div>